@@ -0,0 +1,270 @@
+"""
+Набор бенчмарков для горячих путей всех четырёх лабораторных работ.
+
+Каждый бенчмарк готовит данные с фиксированным начальным значением генератора случайных чисел и размером,
+умноженным на --scale. Количество запусков в одном замере подбирается так, чтобы замер длился не меньше
+MIN_SAMPLE_SECONDS, а состояние, которое операция изменяет (например, персонажи Lab 4), создаётся заново перед каждым
+запуском и в замер не входит. Результат - медиана времени одного запуска по REPEATS замерам. Результаты пишутся
+в JSON, и, если есть сохранённый базовый замер (baseline.json), сравниваются с ним: регрессией считается замедление
+больше --tolerance, если оно к тому же больше --min-delta-ms миллисекунд на запуск (меньшие различия - шум), и
+скрипт завершается с кодом 1.
+
+Примеры:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --scale 10 --output results.json
+    python benchmarks/run_benchmarks.py --update-baseline
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+""" Начальное значение генератора случайных чисел для всех бенчмарков """
+SEED = 12345
+
+""" Количество замеров; в результат идёт медиана """
+REPEATS = 7
+
+""" Минимальная длительность одного замера в секундах (короткие операции запускаются в замере несколько раз) """
+MIN_SAMPLE_SECONDS = 0.05
+
+""" Бенчмарк: функция подготовки (размер, генератор) -> prepare; prepare() -> операция для одного запуска """
+Benchmark = Callable[[int, random.Random], Callable[[], Callable[[], None]]]
+
+
+def bench_library_get_index_by_book_id(size: int, rng: random.Random) -> Callable[[], Callable[[], None]]:
+    """ Lab 2: поиск индекса книги по идентификатору в библиотеке из size книг """
+    from oop_labs import lab2
+    library = lab2.Library([lab2.Book(id_=id_, name=f"book_{id_}", pages=100) for id_ in range(1, size + 1)])
+    book_ids = [rng.randint(1, size) for _ in range(1000)]
+
+    def run() -> None:
+        for book_id in book_ids:
+            library.get_index_by_book_id(book_id)
+    return lambda: run
+
+
+def bench_library_get_next_book_id(size: int, rng: random.Random) -> Callable[[], Callable[[], None]]:
+    """ Lab 2: получение следующего идентификатора книги """
+    from oop_labs import lab2
+    library = lab2.Library([lab2.Book(id_=id_, name=f"book_{id_}", pages=100) for id_ in range(1, size + 1)])
+
+    def run() -> None:
+        for _ in range(10_000):
+            library.get_next_book_id()
+    return lambda: run
+
+
+def bench_book_construction(size: int, rng: random.Random) -> Callable[[], Callable[[], None]]:
+    """ Lab 2: создание size книг с валидацией в Book.__init__ """
+    from oop_labs import lab2
+    records = [(id_, f"book_{id_}", rng.randint(1, 1000)) for id_ in range(1, size + 1)]
+
+    def run() -> None:
+        for id_, name, pages in records:
+            lab2.Book(id_=id_, name=name, pages=pages)
+    return lambda: run
+
+
+def bench_lab3_construction_and_rendering(size: int, rng: random.Random) -> Callable[[], Callable[[], None]]:
+    """ Lab 3: создание бумажных и аудиокниг и вызов __str__ и __repr__ """
+    from oop_labs import lab3
+    records = [(f"book_{index}", f"author_{index}", rng.randint(1, 1000), rng.uniform(0.5, 20.0))
+               for index in range(size)]
+
+    def run() -> None:
+        for name, author, pages, duration in records:
+            for book in (lab3.PaperBook(name=name, author=author, pages=pages),
+                         lab3.AudioBook(name=name, author=author, duration=duration)):
+                str(book)
+                repr(book)
+    return lambda: run
+
+
+def bench_student_performance(size: int, rng: random.Random) -> Callable[[], Callable[[], None]]:
+    """
+    Lab 1: создание StudentPerformance со списком из size оценок (проверка оценок в __init__).
+    Методы calculate_mean_score и has_failed_exams - заглушки, поэтому не замеряются
+    """
+    from oop_labs import lab1
+    grades = [rng.randint(2, 5) for _ in range(size)]
+
+    def run() -> None:
+        for _ in range(100):
+            lab1.StudentPerformance("Иван Иванов", grades)
+    return lambda: run
+
+
+def bench_football_club(size: int, rng: random.Random) -> Callable[[], Callable[[], None]]:
+    """
+    Lab 1: создание FootballClub с составом из size игроков (проверка состава в __init__).
+    Трансферные методы и get_points_for_match - заглушки, поэтому не замеряются
+    """
+    from oop_labs import lab1
+    squad = [f"player_{index}" for index in range(size)]
+
+    def run() -> None:
+        for _ in range(100):
+            lab1.FootballClub(squad, 750000000.0, 91)
+    return lambda: run
+
+
+def bench_character_loop(size: int, rng: random.Random) -> Callable[[], Callable[[], None]]:
+    """ Lab 4: цикл урона, лечения, опыта и повышения уровня для новых персонажей всех ролей """
+    from oop_labs import lab4
+    roles = [lab4.Character, lab4.Magician, lab4.Warrior] * (size // 3)
+    amounts = [rng.randint(1, 50) for _ in range(len(roles))]
+
+    def prepare() -> Callable[[], None]:
+        # каждый запуск начинается с новых персонажей, иначе уровень и опыт накапливались бы между запусками
+        characters = [role(id_=index, name=f"player_{index}") for index, role in enumerate(roles)]
+
+        def run() -> None:
+            for character, amount in zip(characters, amounts):
+                character.get_damage(amount)
+                character.heal(amount)
+                character.get_xp(amount * 40)
+                character.level_up(1)
+        return run
+    return prepare
+
+
+""" Бенчмарки: имя -> (функция подготовки, базовый размер входных данных) """
+BENCHMARKS: dict[str, tuple[Benchmark, int]] = {
+    'lab1_student_performance_construction': (bench_student_performance, 10_000),
+    'lab1_football_club_construction': (bench_football_club, 1_000),
+    'lab2_book_construction': (bench_book_construction, 10_000),
+    'lab2_library_get_index_by_book_id': (bench_library_get_index_by_book_id, 2_000),
+    'lab2_library_get_next_book_id': (bench_library_get_next_book_id, 2_000),
+    'lab3_construction_and_rendering': (bench_lab3_construction_and_rendering, 5_000),
+    'lab4_character_loop': (bench_character_loop, 6_000),
+}
+
+
+def run_benchmarks(scale: float = 1.0, names: list[str] = None) -> dict[str, dict]:
+    """
+    Запускает бенчмарки
+
+    :param scale: множитель размера входных данных
+    :param names: имена бенчмарков (по умолчанию все)
+
+    :return: словарь {имя бенчмарка: {'size': размер, 'number': запусков в замере, 'seconds': медиана времени
+             одного запуска}}
+    """
+    prepared = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name in names or BENCHMARKS:
+            setup, base_size = BENCHMARKS[name]
+            size = max(3, int(base_size * scale))
+            prepare = setup(size, random.Random(SEED))
+            prepared[name] = (size, prepare, _calibrate(prepare), [])
+        # замеры идут по кругу, чтобы кратковременное замедление всей машины попало в один замер каждого бенчмарка
+        # и отсеялось медианой, а не испортило все замеры одного бенчмарка
+        for _ in range(REPEATS):
+            for size, prepare, number, timings in prepared.values():
+                timings.append(_sample(prepare, number) / number)
+    return {name: {'size': size, 'number': number, 'seconds': statistics.median(timings)}
+            for name, (size, prepare, number, timings) in prepared.items()}
+
+
+def _sample(prepare: Callable[[], Callable[[], None]], number: int) -> float:
+    """
+    Готовит number запусков (не замеряется) и возвращает суммарное время их выполнения.
+    Сборщик мусора на время замера отключается, как в timeit, чтобы его запуски не попадали в случайные замеры
+    """
+    runs = [prepare() for _ in range(number)]
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for run in runs:
+            run()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def _calibrate(prepare: Callable[[], Callable[[], None]]) -> int:
+    """ Подбирает количество запусков, при котором замер длится не меньше MIN_SAMPLE_SECONDS """
+    number = 1
+    while True:
+        elapsed = _sample(prepare, number)
+        if elapsed >= MIN_SAMPLE_SECONDS:
+            return number
+        # с запасом 20%, но не больше чем в 100 раз за шаг (первый запуск бывает медленнее из-за прогрева)
+        number = max(number + 1, min(number * 100, int(number * MIN_SAMPLE_SECONDS * 1.2 / max(elapsed, 1e-9))))
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], tolerance: float,
+            min_delta: float = 0.0) -> list[str]:
+    """
+    Сравнивает медианы с базовым замером. Сравниваются только бенчмарки с тем же размером входных данных
+
+    :param tolerance: допустимое относительное замедление (0.25 = 25%)
+    :param min_delta: минимальное абсолютное замедление одного запуска в секундах, которое считается регрессией
+
+    :return: список описаний регрессий (пустой, если регрессий нет)
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None or reference['size'] != result['size']:
+            continue
+        ratio = result['seconds'] / reference['seconds']
+        if ratio > 1 + tolerance and result['seconds'] - reference['seconds'] > min_delta:
+            regressions.append(f"{name}: {reference['seconds'] * 1000:.2f} мс -> {result['seconds'] * 1000:.2f} мс "
+                               f"(x{ratio:.2f})")
+    return regressions
+
+
+def main() -> int:
+    """ Точка входа командной строки; возвращает код завершения """
+    parser = argparse.ArgumentParser(description="Бенчмарки горячих путей лабораторных работ")
+    parser.add_argument('--scale', type=float, default=1.0, help="множитель размера входных данных")
+    parser.add_argument('--only', nargs='*', choices=sorted(BENCHMARKS), help="запустить только эти бенчмарки")
+    parser.add_argument('--output', help="путь к JSON-файлу с результатами")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="путь к базовому замеру")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="допустимое замедление (0.25 = 25%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=0.5,
+                        help="минимальное замедление одного запуска в миллисекундах, которое считается регрессией")
+    parser.add_argument('--update-baseline', action='store_true', help="сохранить результаты как базовый замер")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.scale, args.only)
+    for name, result in results.items():
+        print(f"{name:40} size={result['size']:<8} x{result['number']:<5} {result['seconds'] * 1000:10.3f} мс")
+
+    report = {'python': platform.python_version(), 'machine': platform.machine(), 'seed': SEED,
+              'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+            file.write('\n')
+        return 0
+    if not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline, encoding='utf-8') as file:
+        baseline = json.load(file)['results']
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms / 1000)
+    for regression in regressions:
+        print(f"Регрессия: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
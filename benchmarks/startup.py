@@ -0,0 +1,69 @@
+"""
+Бенчмарк времени запуска: сколько стоит `import oop_labs` и первое обращение к классам.
+
+Каждый сценарий выполняется в новом процессе интерпретатора (иначе модули уже были бы в sys.modules), время
+берётся как лучшее из --repeats запусков за вычетом запуска пустого интерпретатора. Дополнительно выводится
+время импорта самого пакета по данным `python -X importtime`.
+
+Пример:
+    python benchmarks/startup.py --repeats 20
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+""" Сценарии: название -> код, выполняемый в новом интерпретаторе """
+SCENARIOS = {
+    'empty interpreter': 'pass',
+    'import oop_labs': 'import oop_labs',
+    'oop_labs.Magician': 'import oop_labs; oop_labs.Magician',
+    'oop_labs.Library': 'import oop_labs; oop_labs.Library',
+    'all classes': 'import oop_labs; [getattr(oop_labs, name) for name in oop_labs.__all__]',
+}
+
+
+def run_scenario(code: str, repeats: int) -> float:
+    """
+    Запускает код в новом интерпретаторе repeats раз
+
+    :return: лучшее время запуска в секундах
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def package_import_time() -> int:
+    """ Возвращает время импорта пакета oop_labs в микросекундах по данным -X importtime (с вложенными модулями) """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import oop_labs'], cwd=ROOT, check=True,
+                            capture_output=True, text=True)
+    for line in result.stderr.splitlines():
+        # формат строки: "import time: self [us] | cumulative | imported package"
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] == 'oop_labs':
+            return int(fields[1])
+    raise RuntimeError("В выводе -X importtime нет пакета oop_labs")
+
+
+def main() -> None:
+    """ Точка входа командной строки """
+    parser = argparse.ArgumentParser(description="Бенчмарк времени запуска пакета oop_labs")
+    parser.add_argument('--repeats', type=int, default=10, help="количество запусков каждого сценария")
+    args = parser.parse_args()
+
+    timings = {name: run_scenario(code, args.repeats) for name, code in SCENARIOS.items()}
+    baseline = timings['empty interpreter']
+    for name, elapsed in timings.items():
+        print(f"{name:20} {elapsed * 1000:8.1f} мс (+{(elapsed - baseline) * 1000:.1f} мс)")
+    print(f"-X importtime oop_labs: {package_import_time()} мкс")
+
+
+if __name__ == "__main__":
+    main()
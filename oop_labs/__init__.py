@@ -0,0 +1,64 @@
+"""
+Пакет с классами моделей всех лабораторных работ.
+
+Импорт пакета ничего не загружает: подмодули lab1-lab4 и классы загружаются при первом обращении к ним
+(функция __getattr__ модуля, PEP 562), поэтому `import oop_labs` почти ничего не стоит, а каждый модуль
+лабораторной выполняется один раз.
+
+Классы с совпадающими именами доступны только через подмодули: oop_labs.lab2.Book - книга библиотеки
+(Лабораторная 2), oop_labs.lab3.Book - базовый класс бумажных и аудиокниг (Лабораторная 3).
+
+Пример:
+    import oop_labs
+    magician = oop_labs.Magician(id_=53642, name="MasterMerlin")
+    library = oop_labs.Library([oop_labs.lab2.Book(id_=1, name="test_name_1", pages=200)])
+"""
+import sys
+
+""" Подмодули пакета, загружаемые при первом обращении """
+SUBMODULES = ('lab1', 'lab2', 'lab3', 'lab4')
+
+""" Классы, доступные из пакета напрямую: имя -> подмодуль """
+_CLASSES = {
+    'PlayerInfo': 'lab1',
+    'StudentPerformance': 'lab1',
+    'FootballClub': 'lab1',
+    'Glass': 'lab1',
+    'Library': 'lab2',
+    'BookCursor': 'lab2',
+    'PaperBook': 'lab3',
+    'AudioBook': 'lab3',
+    'Character': 'lab4',
+    'Magician': 'lab4',
+    'Warrior': 'lab4',
+}
+
+__all__ = list(SUBMODULES) + list(_CLASSES)
+
+
+def _import_submodule(name: str):
+    """ Импортирует подмодуль пакета (встроенным __import__, чтобы не загружать importlib при импорте пакета) """
+    __import__(f'{__name__}.{name}')
+    return sys.modules[f'{__name__}.{name}']
+
+
+def __getattr__(name: str):
+    """
+    Загружает подмодуль или класс при первом обращении и сохраняет его в пакете, чтобы последующие обращения
+    не проходили через эту функцию
+
+    :raise AttributeError: если такого имени в пакете нет, вызываем ошибку
+    """
+    if name in SUBMODULES:
+        return _import_submodule(name)
+    submodule = _CLASSES.get(name)
+    if submodule is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(_import_submodule(submodule), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    """ Возвращает имена пакета вместе с ещё не загруженными подмодулями и классами """
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,57 @@
+"""
+Загрузка модулей из каталогов лабораторных работ.
+
+Каталоги "Лабораторная N" содержат пробелы и кириллицу и не являются пакетами, поэтому модули загружаются по пути
+к файлу и регистрируются в sys.modules под постоянным именем.
+
+Каталоги лабораторных 2 и 4 (SHARED_LABS) добавляются в sys.path: их модули зарегистрированы под именами своих
+файлов, поэтому соседние модули (например, regeneration.py рядом с Lab4.py) импортируют тот же самый модуль и
+работают с теми же классами. Каталоги лабораторных 1 и 3 в sys.path не добавляются: в обоих есть main.py, и имя
+main указывало бы на файл того каталога, который добавлен первым. Соседние модули лабораторной 1 (matchmaking.py)
+импортируют её классы через oop_labs.lab1, а не из main, чтобы main.py загружался один раз.
+"""
+import importlib.util
+import os
+import sys
+from types import ModuleType
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+""" Модули с классами моделей: имя в sys.modules -> (номер лабораторной, имя файла) """
+LAB_MODULES = {
+    'lab1_main': ('1', 'main.py'),
+    'lab1_example': ('1', 'example.py'),
+    'task2_classLibrary': ('2', 'task2_classLibrary.py'),
+    'Lab3': ('3', 'Lab3.py'),
+    'Lab4': ('4', 'Lab4.py'),
+}
+
+""" Лабораторные, каталоги которых добавляются в sys.path для соседних модулей (имена их модулей не конфликтуют) """
+SHARED_LABS = ('2', '4')
+
+
+def load_lab_module(module_name: str) -> ModuleType:
+    """
+    Загружает модуль лабораторной работы из LAB_MODULES (повторный вызов возвращает уже загруженный модуль)
+
+    :param module_name: имя модуля из LAB_MODULES
+
+    :raise KeyError: если модуля нет в LAB_MODULES, вызываем ошибку
+
+    :return: загруженный модуль
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    lab, file_name = LAB_MODULES[module_name]
+    directory = os.path.join(ROOT, f'Лабораторная {lab}')
+    if lab in SHARED_LABS and directory not in sys.path:
+        sys.path.append(directory)
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(directory, file_name))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
+    return module
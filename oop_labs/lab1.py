@@ -0,0 +1,14 @@
+"""
+Лабораторная 1: классы с документацией и валидацией (файлы "Лабораторная 1/main.py" и "Лабораторная 1/example.py")
+"""
+from ._loader import load_lab_module
+
+_main = load_lab_module('lab1_main')
+_example = load_lab_module('lab1_example')
+
+PlayerInfo = _main.PlayerInfo
+StudentPerformance = _main.StudentPerformance
+FootballClub = _main.FootballClub
+Glass = _example.Glass
+
+__all__ = ['PlayerInfo', 'StudentPerformance', 'FootballClub', 'Glass']
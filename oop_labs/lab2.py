@@ -0,0 +1,16 @@
+"""
+Лабораторная 2: книга и библиотека (файл "Лабораторная 2/task2_classLibrary.py").
+
+Класс Book из task1_classBook.py совпадает с классом Book из task2_classLibrary.py, поэтому используется второй -
+именно его экземпляры хранит Library.
+"""
+from ._loader import load_lab_module
+
+_library = load_lab_module('task2_classLibrary')
+
+Book = _library.Book
+Library = _library.Library
+BookCursor = _library.BookCursor
+BOOKS_DATABASE = _library.BOOKS_DATABASE
+
+__all__ = ['Book', 'Library', 'BookCursor', 'BOOKS_DATABASE']
@@ -0,0 +1,14 @@
+"""
+Лабораторная 3: наследование книг (файл "Лабораторная 3/Lab3.py").
+
+"Лабораторная 3/main.py" - исходная заготовка задания без наследования и свойств, поэтому здесь не используется.
+"""
+from ._loader import load_lab_module
+
+_lab3 = load_lab_module('Lab3')
+
+Book = _lab3.Book
+PaperBook = _lab3.PaperBook
+AudioBook = _lab3.AudioBook
+
+__all__ = ['Book', 'PaperBook', 'AudioBook']
@@ -0,0 +1,12 @@
+"""
+Лабораторная 4: персонажи онлайн-игры (файл "Лабораторная 4/Lab4.py")
+"""
+from ._loader import load_lab_module
+
+_lab4 = load_lab_module('Lab4')
+
+Character = _lab4.Character
+Magician = _lab4.Magician
+Warrior = _lab4.Warrior
+
+__all__ = ['Character', 'Magician', 'Warrior']
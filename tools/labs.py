@@ -0,0 +1,22 @@
+"""
+Загрузка модулей лабораторных работ для инструментов из каталога tools.
+
+Каталоги лабораторных работ содержат пробелы и кириллицу, поэтому их нельзя импортировать как пакеты: модули
+загружаются по пути к файлу загрузчиком пакета oop_labs и регистрируются в sys.modules под уникальными именами.
+"""
+import inspect
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from oop_labs._loader import LAB_MODULES, ROOT, load_lab_module as load_module  # noqa: E402,F401
+
+
+def project_classes() -> list[type]:
+    """ Возвращает все классы моделей, объявленные в модулях лабораторных работ """
+    classes = []
+    for module_name in LAB_MODULES:
+        module = load_module(module_name)
+        classes.extend(cls for _, cls in inspect.getmembers(module, inspect.isclass)
+                       if cls.__module__ == module.__name__)
+    return classes
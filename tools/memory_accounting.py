@@ -0,0 +1,219 @@
+"""
+Учёт памяти по классам моделей проекта.
+
+Снимок памяти для каждого класса содержит:
+    count - количество живых экземпляров (найденных обходом объектов сборщика мусора);
+    bytes - размер экземпляров вместе с их __dict__ и принадлежащими им списками и словарями (например, grades
+            у StudentPerformance, squad у FootballClub, books у Library) и элементами этих контейнеров. Значение,
+            общее для нескольких экземпляров (например, один список у нескольких владельцев или одна и та же строка),
+            учитывается один раз за снимок - у первого найденного владельца;
+    traced_bytes - память, выделенная строками исходного кода класса (его методов) и ещё не освобождённая, по данным
+                   tracemalloc (только если отслеживание выделений включено). Это не память экземпляров класса:
+                   учитывается только место выделения, поэтому объекты, созданные вызывающим кодом и переданные
+                   экземпляру (например, список оценок, построенный до вызова StudentPerformance(...)), относятся
+                   к вызывающему коду, а не к классу.
+Два снимка можно сравнить, чтобы увидеть рост. BackgroundSampler делает снимки в фоновом потоке с заданным
+интервалом и хранит ограниченное количество последних снимков.
+"""
+import gc
+import inspect
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Optional
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from labs import load_module, project_classes  # noqa: E402
+
+
+class MemorySnapshot:
+    """ Снимок памяти: статистика по классам на момент времени """
+
+    def __init__(self, taken_at: float, classes: dict[str, dict[str, int]]):
+        """
+        Инициализация снимка
+
+        :param taken_at: время снимка (time.time())
+        :param classes: {имя класса: {'count': ..., 'bytes': ..., 'traced_bytes': ...}}
+        """
+        self.taken_at = taken_at
+        self.classes = classes
+
+    def diff(self, older: 'MemorySnapshot') -> dict[str, dict[str, int]]:
+        """
+        Возвращает прирост по сравнению с более старым снимком
+
+        :param older: более ранний снимок
+
+        :return: {имя класса: {'count': прирост, 'bytes': прирост, 'traced_bytes': прирост}} для изменившихся классов
+        """
+        growth = {}
+        for name in self.classes.keys() | older.classes.keys():
+            new = self.classes.get(name, {})
+            old = older.classes.get(name, {})
+            delta = {key: new.get(key, 0) - old.get(key, 0) for key in ('count', 'bytes', 'traced_bytes')}
+            if any(delta.values()):
+                growth[name] = delta
+        return growth
+
+    def report(self) -> str:
+        """ Возвращает текстовую таблицу снимка, отсортированную по убыванию занятой памяти """
+        lines = [f"{'class':45} {'count':>10} {'bytes':>14} {'traced bytes':>14}"]
+        for name, stats in sorted(self.classes.items(), key=lambda item: -item[1]['bytes']):
+            lines.append(f"{name:45} {stats['count']:>10} {stats['bytes']:>14} {stats['traced_bytes']:>14}")
+        return '\n'.join(lines)
+
+
+def _owned_size(value, seen: set) -> int:
+    """
+    Размер значения атрибута, принадлежащего экземпляру: для списков, кортежей, множеств и словарей - вместе с
+    элементами. Экземпляры других классов не учитываются (они считаются у своего класса)
+    """
+    if id(value) in seen or (hasattr(value, '__dict__') and not isinstance(value, type)):
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_owned_size(item, seen) for item in value)
+    elif isinstance(value, dict):
+        size += sum(_owned_size(key, seen) + _owned_size(item, seen) for key, item in value.items())
+    return size
+
+
+class MemoryAccountant:
+    """ Подсчёт памяти, занятой экземплярами набора классов """
+
+    def __init__(self, classes: list[type], trace_allocations: bool = False):
+        """
+        Инициализация учёта
+
+        :param classes: классы моделей
+        :param trace_allocations: включить tracemalloc (с одним кадром стека) для подсчёта traced_bytes.
+                                  Отслеживание выделений замедляет программу, поэтому по умолчанию выключено
+        """
+        self.classes = tuple(classes)
+        self._names = {cls: f'{cls.__module__}.{cls.__qualname__}' for cls in self.classes}
+        # строка исходного кода -> класс, в теле которого она находится (для разбора статистики tracemalloc)
+        self._line_owners = {}
+        for cls in self.classes:
+            lines, start = inspect.getsourcelines(cls)
+            file_name = inspect.getsourcefile(cls)
+            for line_number in range(start, start + len(lines)):
+                self._line_owners[file_name, line_number] = self._names[cls]
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+
+    def _traced_bytes(self) -> dict[str, int]:
+        """ Память, выделенная строками кода каждого класса (а не его экземплярами), по текущему снимку tracemalloc """
+        traced = {}
+        if not tracemalloc.is_tracing():
+            return traced
+        for statistic in tracemalloc.take_snapshot().statistics('lineno'):
+            frame = statistic.traceback[0]
+            name = self._line_owners.get((frame.filename, frame.lineno))
+            if name is not None:
+                traced[name] = traced.get(name, 0) + statistic.size
+        return traced
+
+    def snapshot(self) -> MemorySnapshot:
+        """
+        Делает снимок: обходит объекты сборщика мусора и считает экземпляры классов и занятую ими память.
+        Каждое значение атрибута учитывается в снимке не больше одного раза, даже если оно общее для нескольких
+        экземпляров
+
+        :return: снимок памяти
+        """
+        stats = {name: {'count': 0, 'bytes': 0, 'traced_bytes': 0} for name in self._names.values()}
+        # id уже учтённых объектов: общий для всего снимка
+        seen = set()
+        for obj in gc.get_objects():
+            cls = type(obj)
+            name = self._names.get(cls)
+            if name is None:
+                continue
+            size = sys.getsizeof(obj)
+            attributes = getattr(obj, '__dict__', None)
+            if attributes is not None:
+                seen.add(id(attributes))
+                size += sys.getsizeof(attributes)
+                size += sum(_owned_size(value, seen) for value in attributes.values())
+            stats[name]['count'] += 1
+            stats[name]['bytes'] += size
+        for name, traced_bytes in self._traced_bytes().items():
+            stats[name]['traced_bytes'] = traced_bytes
+        return MemorySnapshot(time.time(), stats)
+
+
+class BackgroundSampler:
+    """ Фоновый поток, делающий снимки памяти с заданным интервалом """
+
+    def __init__(self, accountant: MemoryAccountant, interval: float = 10.0, keep: int = 60):
+        """
+        Инициализация сэмплера (поток запускается методом start)
+
+        :param accountant: объект учёта памяти
+        :param interval: интервал между снимками в секундах
+        :param keep: сколько последних снимков хранить
+        """
+        self.accountant = accountant
+        self.interval = interval
+        self.snapshots = deque(maxlen=keep)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """ Запускает фоновый поток """
+        def run() -> None:
+            while True:
+                self.snapshots.append(self.accountant.snapshot())
+                if self._stop.wait(self.interval):
+                    break
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """ Останавливает фоновый поток """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def growth(self) -> Optional[dict[str, dict[str, int]]]:
+        """ Возвращает прирост между самым старым и самым новым из хранимых снимков (None, если снимков меньше двух) """
+        if len(self.snapshots) < 2:
+            return None
+        return self.snapshots[-1].diff(self.snapshots[0])
+
+
+if __name__ == "__main__":
+    accountant = MemoryAccountant(project_classes(), trace_allocations=True)
+    before = accountant.snapshot()
+
+    lab1 = load_module('lab1_main')
+    lab2 = load_module('task2_classLibrary')
+    lab4 = load_module('Lab4')
+    students = [lab1.StudentPerformance(f"student_{index}", [4, 5, 3] * 10) for index in range(1000)]
+    library = lab2.Library([lab2.Book(id_=id_, name=f"book_{id_}", pages=100) for id_ in range(1, 5001)])
+    warriors = [lab4.Warrior(id_=id_, name=f"player_{id_}") for id_ in range(2000)]
+
+    after = accountant.snapshot()
+    print(after.report())
+    print(after.diff(before))
+
+    # без tracemalloc снимок - это только обход объектов сборщика мусора
+    tracemalloc.stop()
+    accountant = MemoryAccountant(project_classes())
+    start = time.perf_counter()
+    accountant.snapshot()
+    print(f"Время снимка без tracemalloc: {(time.perf_counter() - start) * 1000:.1f} мс")
+
+    sampler = BackgroundSampler(accountant, interval=0.2)
+    sampler.start()
+    time.sleep(0.1)
+    warriors += [lab4.Warrior(id_=id_, name=f"player_{id_}") for id_ in range(2000, 3000)]
+    time.sleep(0.5)
+    sampler.stop()
+    print(f"Снимков: {len(sampler.snapshots)}, прирост: {sampler.growth()}")
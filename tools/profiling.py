@@ -0,0 +1,238 @@
+"""
+Профилирование публичных методов классов моделей, включаемое во время работы.
+
+Profiler.enable() подменяет публичные методы переданных классов обёртками, которые считают вызовы и записывают
+время выполнения в гистограмму с логарифмическими интервалами (как HDR-гистограмма: относительная погрешность
+значения не больше 1 / SUB_BUCKETS). Profiler.disable() возвращает исходные методы, поэтому в выключенном
+состоянии профилирование не добавляет никаких накладных расходов. Результаты выгружаются текстовым отчётом и в
+текстовом формате Prometheus (exposition format) в локальный файл.
+
+Пример:
+    profiler = Profiler(project_classes())
+    profiler.enable()
+    ...
+    profiler.disable()
+    print(profiler.report())
+    profiler.write_prometheus('metrics.prom')
+"""
+import functools
+import os
+import random
+import sys
+import time
+from typing import Callable
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from labs import load_module, project_classes  # noqa: E402
+
+
+class LatencyHistogram:
+    """
+    Гистограмма задержек в наносекундах. Значения от 2 ** k до 2 ** (k + 1) делятся на SUB_BUCKETS равных
+    интервалов, поэтому запись выполняется за O(1), а память не зависит от количества значений
+    """
+
+    """ Количество бит точности внутри степени двойки (2 ** 3 = 8 интервалов) """
+    SUB_BUCKET_BITS = 3
+    SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+    """ Максимальная степень двойки: значения больше 2 ** 64 нс попадают в последний интервал """
+    MAX_EXPONENT = 64
+
+    def __init__(self):
+        """ Инициализация пустой гистограммы """
+        self.counts = [0] * (self.MAX_EXPONENT * self.SUB_BUCKETS)
+        self.total_count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def _index(self, value_ns: int) -> int:
+        """ Возвращает индекс интервала для значения value_ns """
+        if value_ns < self.SUB_BUCKETS:
+            return value_ns
+        exponent = value_ns.bit_length() - 1 - self.SUB_BUCKET_BITS
+        index = (exponent + 1) * self.SUB_BUCKETS + ((value_ns >> exponent) - self.SUB_BUCKETS)
+        return min(index, len(self.counts) - 1)
+
+    def bucket_upper_bound(self, index: int) -> int:
+        """ Возвращает верхнюю границу (не включая) интервала с индексом index в наносекундах """
+        if index < self.SUB_BUCKETS:
+            return index + 1
+        exponent = index // self.SUB_BUCKETS - 1
+        return (self.SUB_BUCKETS + index % self.SUB_BUCKETS + 1) << exponent
+
+    def record(self, value_ns: int) -> None:
+        """
+        Записывает значение в гистограмму
+
+        :param value_ns: задержка в наносекундах
+        """
+        self.counts[self._index(value_ns)] += 1
+        self.total_count += 1
+        self.total_ns += value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+
+    def percentile(self, fraction: float) -> int:
+        """
+        Возвращает перцентиль задержки (верхнюю границу интервала, в котором он находится)
+
+        :param fraction: доля от 0 до 1, например 0.99
+
+        :return: задержка в наносекундах (0 для пустой гистограммы)
+        """
+        threshold = self.total_count * fraction
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= threshold:
+                return min(self.bucket_upper_bound(index), self.max_ns)
+        return 0
+
+
+class Profiler:
+    """ Профилировщик публичных методов набора классов """
+
+    def __init__(self, classes: list[type]):
+        """
+        Инициализация профилировщика. Методы не подменяются до вызова enable()
+
+        :param classes: классы, публичные методы которых нужно профилировать
+        """
+        self.classes = classes
+        self.histograms = {}
+        self._originals = []
+        self.enabled = False
+
+    def _wrap(self, name: str, method: Callable) -> Callable:
+        """ Возвращает обёртку метода, записывающую время выполнения в гистограмму name """
+        histogram = self.histograms.setdefault(name, LatencyHistogram())
+        perf_counter_ns = time.perf_counter_ns
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                histogram.record(perf_counter_ns() - start)
+        return wrapper
+
+    def enable(self) -> None:
+        """ Подменяет публичные методы классов профилирующими обёртками (повторный вызов ничего не делает) """
+        if self.enabled:
+            return
+        for cls in self.classes:
+            for attribute, value in list(vars(cls).items()):
+                if attribute.startswith('_') or not callable(value) or isinstance(value, (type, staticmethod,
+                                                                                         classmethod)):
+                    continue
+                self._originals.append((cls, attribute, value))
+                setattr(cls, attribute, self._wrap(f'{cls.__module__}.{cls.__qualname__}.{attribute}', value))
+        self.enabled = True
+
+    def disable(self) -> None:
+        """ Возвращает исходные методы классов. Накопленная статистика сохраняется """
+        for cls, attribute, value in self._originals:
+            setattr(cls, attribute, value)
+        self._originals = []
+        self.enabled = False
+
+    def reset(self) -> None:
+        """ Сбрасывает накопленную статистику """
+        for histogram in self.histograms.values():
+            histogram.__init__()
+
+    def report(self) -> str:
+        """
+        Возвращает текстовый отчёт: методы по убыванию суммарного времени с количеством вызовов и перцентилями
+
+        :return: таблица в виде строки
+        """
+        lines = [f"{'method':60} {'calls':>10} {'total ms':>10} {'p50 us':>9} {'p99 us':>9} {'max us':>9}"]
+        for name, histogram in sorted(self.histograms.items(), key=lambda item: -item[1].total_ns):
+            if not histogram.total_count:
+                continue
+            lines.append(f"{name:60} {histogram.total_count:>10} {histogram.total_ns / 1e6:>10.2f} "
+                         f"{histogram.percentile(0.5) / 1e3:>9.2f} {histogram.percentile(0.99) / 1e3:>9.2f} "
+                         f"{histogram.max_ns / 1e3:>9.2f}")
+        return '\n'.join(lines)
+
+    def prometheus_exposition(self) -> str:
+        """
+        Возвращает статистику в текстовом формате Prometheus: счётчик вызовов и гистограмма задержек в секундах.
+        Границы интервалов гистограммы Prometheus - степени двойки наносекунд
+
+        :return: текст в формате exposition
+        """
+        lines = [
+            '# HELP lab_method_calls_total Number of calls of a model method.',
+            '# TYPE lab_method_calls_total counter',
+        ]
+        for name, histogram in sorted(self.histograms.items()):
+            lines.append(f'lab_method_calls_total{{method="{name}"}} {histogram.total_count}')
+        lines += [
+            '# HELP lab_method_latency_seconds Latency of a model method.',
+            '# TYPE lab_method_latency_seconds histogram',
+        ]
+        for name, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            bucket_index = 0
+            for exponent in range(1, histogram.MAX_EXPONENT + 1):
+                bound = 1 << exponent
+                while bucket_index < len(histogram.counts) and histogram.bucket_upper_bound(bucket_index) <= bound:
+                    cumulative += histogram.counts[bucket_index]
+                    bucket_index += 1
+                lines.append(f'lab_method_latency_seconds_bucket{{method="{name}",le="{bound / 1e9:.9g}"}} '
+                             f'{cumulative}')
+                if cumulative == histogram.total_count:
+                    break
+            lines.append(f'lab_method_latency_seconds_bucket{{method="{name}",le="+Inf"}} {histogram.total_count}')
+            lines.append(f'lab_method_latency_seconds_sum{{method="{name}"}} {histogram.total_ns / 1e9:.9g}')
+            lines.append(f'lab_method_latency_seconds_count{{method="{name}"}} {histogram.total_count}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str) -> None:
+        """
+        Записывает статистику в формате Prometheus в файл (атомарно, через временный файл)
+
+        :param path: путь к файлу, например для textfile-коллектора node_exporter
+        """
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.write(self.prometheus_exposition())
+        os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    lab2 = load_module('task2_classLibrary')
+    lab4 = load_module('Lab4')
+    rng = random.Random(0)
+    library = lab2.Library([lab2.Book(id_=id_, name=f"book_{id_}", pages=100) for id_ in range(1, 1001)])
+    magician = lab4.Magician(id_=53642, name="MasterMerlin")
+
+    def workload() -> None:
+        for _ in range(2000):
+            library.get_index_by_book_id(rng.randint(1, 1000))
+            magician.get_damage(1)
+            magician.heal(1)
+            magician.cast_the_spell('Shield Spell')
+            magician.level_up(1)
+
+    profiler = Profiler(project_classes())
+    start = time.perf_counter()
+    workload()
+    disabled = time.perf_counter()
+    profiler.enable()
+    workload()
+    profiler.disable()
+    enabled = time.perf_counter()
+    workload()
+    restored = time.perf_counter()
+    print(profiler.report())
+    print(f"Выключено: {(disabled - start) * 1000:.1f} мс, включено: {(enabled - disabled) * 1000:.1f} мс, "
+          f"снова выключено: {(restored - enabled) * 1000:.1f} мс")
+    profiler.write_prometheus('lab_metrics.prom')
+    with open('lab_metrics.prom', encoding='utf-8') as metrics_file:
+        print(''.join(metrics_file.readlines()[:8]))
+    os.remove('lab_metrics.prom')
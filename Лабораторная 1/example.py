@@ -1,6 +1,3 @@
-import doctest
-
-
 class Glass:
     def __init__(self, capacity_volume: float, occupied_volume: float):
         """
@@ -71,4 +68,6 @@ class Glass:
 
 
 if __name__ == "__main__":
+    import doctest
+
     doctest.testmod()  # тестирование примеров, которые находятся в документации
@@ -1,6 +1,3 @@
-import doctest
-
-
 # TODO Написать 3 класса с документацией и аннотацией типов
 class PlayerInfo:
     def __init__(self, nickname: str, wins: int, loses: int):
@@ -231,5 +228,7 @@ class FootballClub:
 
 
 if __name__ == "__main__":
+    import doctest
+
     # TODO работоспособность экземпляров класса проверить с помощью doctest
     doctest.testmod()
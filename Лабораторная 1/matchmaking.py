@@ -0,0 +1,338 @@
+"""
+Очередь подбора соперников для игроков PlayerInfo из main.py.
+
+Рейтинг игрока вычисляется по его победам и поражениям (по умолчанию - по формуле Эло, см. player_rating).
+Ожидающие игроки хранятся в корзинах по диапазонам рейтинга; внутри корзины ключи (рейтинг, номер заявки)
+отсортированы, а номера непустых корзин хранятся в отдельном отсортированном списке. Поэтому ближайшие по рейтингу
+ожидающие игроки (соседи слева и справа) находятся двоичным поиском за O(log n).
+
+Окно поиска расширяется со временем ожидания: window(wait) = min(max_window, base_window + widen_per_second * wait).
+Пара игроков подходит друг другу, если разница их рейтингов не больше окна того, кто ждёт дольше. Если какая-то
+пара подходит, то подходит и пара соседей по рейтингу, поэтому достаточно проверять только соседние пары. Для
+каждого игрока вычисляется момент, когда окно одной из его соседних пар дорастёт до разницы рейтингов, и эти моменты
+хранятся в куче: poll(now) обрабатывает только игроков, для которых этот момент наступил, а не всю очередь.
+Постановка в очередь, подбор пары и отмена заявки выполняются за O(log n).
+
+Пример:
+    queue = MatchmakingQueue()
+    queue.enqueue(PlayerInfo("something", 50, 20), now=0.0)
+    queue.enqueue(PlayerInfo("forsaken", 48, 21), now=1.0)
+"""
+import heapq
+import math
+import os
+import random
+import sys
+import time
+from bisect import bisect_left, bisect_right, insort
+from typing import Callable, Optional
+
+# PlayerInfo импортируется через пакет oop_labs, который загружает main.py один раз (как lab1_main): импорт
+# "from main import PlayerInfo" загрузил бы файл ещё раз и создал второй класс PlayerInfo, отличный от
+# oop_labs.PlayerInfo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from oop_labs.lab1 import PlayerInfo  # noqa: E402
+
+
+def player_rating(player: PlayerInfo) -> float:
+    """
+    Рейтинг игрока по формуле Эло: игрок, у которого отношение побед к поражениям равно q, выигрывает у игрока
+    с рейтингом 1500 с шансами q к 1, поэтому его рейтинг 1500 + 400 * log10(q). К победам и поражениям прибавляется
+    по единице, чтобы у новых игроков рейтинг был 1500
+    """
+    return 1500 + 400 * math.log10((player.wins + 1) / (player.loses + 1))
+
+
+class _Ticket:
+    """ Заявка игрока в очереди """
+
+    __slots__ = ('player', 'rating', 'enqueued_at', 'due')
+
+    def __init__(self, player: PlayerInfo, rating: float, enqueued_at: float):
+        """
+        Создание заявки
+
+        :param player: игрок
+        :param rating: рейтинг игрока в момент постановки в очередь
+        :param enqueued_at: момент постановки в очередь
+        """
+        self.player = player
+        self.rating = rating
+        self.enqueued_at = enqueued_at
+        self.due = math.inf
+
+
+class MatchmakingQueue:
+    """ Очередь подбора соперников с близким рейтингом """
+
+    def __init__(self, base_window: float = 25.0, widen_per_second: float = 25.0, max_window: float = 400.0,
+                 bucket_width: float = 50.0, rating: Callable[[PlayerInfo], float] = player_rating):
+        """
+        Инициализация пустой очереди
+
+        :param base_window: допустимая разница рейтингов для только что вставшего в очередь игрока
+        :param widen_per_second: на сколько окно расширяется за секунду ожидания
+        :param max_window: максимальная ширина окна
+        :param bucket_width: ширина диапазона рейтинга одной корзины
+        :param rating: функция, вычисляющая рейтинг игрока
+
+        :raise ValueError: если параметры окна отрицательные, max_window меньше base_window или ширина корзины не
+        положительная, вызываем ошибку
+        """
+        if base_window < 0 or widen_per_second < 0 or max_window < base_window:
+            raise ValueError("Параметры окна поиска должны быть неотрицательными, а max_window не меньше base_window")
+        if bucket_width <= 0:
+            raise ValueError("Ширина корзины должна быть положительной")
+        self.base_window = base_window
+        self.widen_per_second = widen_per_second
+        self.max_window = max_window
+        self.bucket_width = bucket_width
+        self.rating = rating
+        self._tickets = {}
+        self._ticket_by_player = {}
+        self._buckets = {}
+        self._bucket_numbers = []
+        self._due = []
+        self._next_ticket = 0
+        self.matches = 0
+
+    def __len__(self) -> int:
+        """ Количество ожидающих игроков """
+        return len(self._tickets)
+
+    def __contains__(self, player: PlayerInfo) -> bool:
+        """ Ожидает ли игрок в очереди """
+        return id(player) in self._ticket_by_player
+
+    def window(self, wait: float) -> float:
+        """ Возвращает допустимую разницу рейтингов для игрока, ожидающего wait секунд """
+        return min(self.max_window, self.base_window + self.widen_per_second * wait)
+
+    def _wait_for_window(self, distance: float) -> float:
+        """ Возвращает время ожидания, через которое окно дорастёт до distance (math.inf, если никогда) """
+        if distance <= self.base_window:
+            return 0.0
+        if distance > self.max_window or not self.widen_per_second:
+            return math.inf
+        return (distance - self.base_window) / self.widen_per_second
+
+    def _neighbours(self, key: tuple[float, int]) -> tuple[Optional[tuple], Optional[tuple]]:
+        """ Возвращает ключи ближайших ожидающих слева и справа от ключа key (None, если соседа нет) """
+        number = math.floor(key[0] / self.bucket_width)
+        bucket = self._buckets.get(number, ())
+        left = right = None
+        index = bisect_left(bucket, key)
+        if index:
+            left = bucket[index - 1]
+        else:
+            position = bisect_left(self._bucket_numbers, number)
+            if position:
+                left = self._buckets[self._bucket_numbers[position - 1]][-1]
+        index = bisect_right(bucket, key)
+        if index < len(bucket):
+            right = bucket[index]
+        else:
+            position = bisect_right(self._bucket_numbers, number)
+            if position < len(self._bucket_numbers):
+                right = self._buckets[self._bucket_numbers[position]][0]
+        return left, right
+
+    def _insert(self, key: tuple[float, int]) -> None:
+        """ Добавляет ключ в корзину его рейтинга """
+        number = math.floor(key[0] / self.bucket_width)
+        bucket = self._buckets.get(number)
+        if bucket is None:
+            bucket = self._buckets[number] = []
+            insort(self._bucket_numbers, number)
+        insort(bucket, key)
+
+    def _remove(self, key: tuple[float, int]) -> None:
+        """ Удаляет заявку из очереди и пересчитывает моменты проверки её бывших соседей """
+        number = math.floor(key[0] / self.bucket_width)
+        bucket = self._buckets[number]
+        del bucket[bisect_left(bucket, key)]
+        if not bucket:
+            del self._buckets[number]
+            del self._bucket_numbers[bisect_left(self._bucket_numbers, number)]
+        ticket = self._tickets.pop(key[1])
+        del self._ticket_by_player[id(ticket.player)]
+        for neighbour in self._neighbours(key):
+            if neighbour is not None:
+                self._schedule(neighbour)
+
+    def _pair_due(self, first: _Ticket, second: _Ticket) -> float:
+        """ Момент, начиная с которого пара подходит друг другу (по окну того, кто ждёт дольше) """
+        return (min(first.enqueued_at, second.enqueued_at)
+                + self._wait_for_window(abs(first.rating - second.rating)))
+
+    def _schedule(self, key: tuple[float, int]) -> None:
+        """ Пересчитывает момент проверки заявки по её текущим соседям и кладёт его в кучу """
+        ticket = self._tickets[key[1]]
+        due = math.inf
+        for neighbour in self._neighbours(key):
+            if neighbour is not None:
+                due = min(due, self._pair_due(ticket, self._tickets[neighbour[1]]))
+        ticket.due = due
+        if due != math.inf:
+            heapq.heappush(self._due, (due, key))
+
+    def _best_partner(self, key: tuple[float, int], now: float) -> Optional[tuple[float, int]]:
+        """ Возвращает ключ ближайшего по рейтингу соседа, который подходит заявке в момент now (или None) """
+        ticket = self._tickets[key[1]]
+        best = None
+        best_distance = math.inf
+        for neighbour in self._neighbours(key):
+            if neighbour is None:
+                continue
+            partner = self._tickets[neighbour[1]]
+            distance = abs(ticket.rating - partner.rating)
+            window = self.window(now - min(ticket.enqueued_at, partner.enqueued_at))
+            # допуск на погрешность округления: в момент из _pair_due окно равно разнице рейтингов
+            if distance < best_distance and distance <= window + 1e-9:
+                best, best_distance = neighbour, distance
+        return best
+
+    def _match(self, key: tuple[float, int], partner_key: tuple[float, int],
+               now: float) -> tuple[PlayerInfo, PlayerInfo, float]:
+        """ Убирает пару из очереди; возвращает (игрок, который ждал дольше, его соперник, время ожидания первого) """
+        first, second = self._tickets[key[1]], self._tickets[partner_key[1]]
+        if second.enqueued_at < first.enqueued_at:
+            first, second = second, first
+        self._remove(key)
+        self._remove(partner_key)
+        self.matches += 1
+        return first.player, second.player, now - first.enqueued_at
+
+    def enqueue(self, player: PlayerInfo,
+                now: Optional[float] = None) -> Optional[tuple[PlayerInfo, PlayerInfo, float]]:
+        """
+        Ставит игрока в очередь. Если среди ожидающих уже есть подходящий соперник, пара составляется сразу
+
+        :param player: игрок
+        :param now: текущее время в секундах (по умолчанию time.monotonic())
+
+        :raise ValueError: если игрок уже в очереди, вызываем ошибку
+
+        :return: пара (игрок, который ждал дольше, его соперник, время ожидания первого) или None
+        """
+        if id(player) in self._ticket_by_player:
+            raise ValueError("Игрок уже ожидает в очереди")
+        now = time.monotonic() if now is None else now
+        ticket = _Ticket(player, self.rating(player), now)
+        key = (ticket.rating, self._next_ticket)
+        self._next_ticket += 1
+        self._tickets[key[1]] = ticket
+        self._ticket_by_player[id(player)] = key
+        self._insert(key)
+        partner_key = self._best_partner(key, now)
+        if partner_key is not None:
+            return self._match(key, partner_key, now)
+        self._schedule(key)
+        for neighbour in self._neighbours(key):
+            if neighbour is not None:
+                self._schedule(neighbour)
+        return None
+
+    def cancel(self, player: PlayerInfo) -> None:
+        """
+        Убирает игрока из очереди
+
+        :raise ValueError: если игрока нет в очереди, вызываем ошибку
+        """
+        key = self._ticket_by_player.get(id(player))
+        if key is None:
+            raise ValueError("Игрок не ожидает в очереди")
+        self._remove(key)
+
+    def poll(self, now: Optional[float] = None) -> list[tuple[PlayerInfo, PlayerInfo, float]]:
+        """
+        Составляет пары, которые стали возможны к моменту now благодаря расширению окон
+
+        :param now: текущее время в секундах (по умолчанию time.monotonic())
+
+        :return: список пар (игрок, который ждал дольше, его соперник, время ожидания первого)
+        """
+        now = time.monotonic() if now is None else now
+        matches = []
+        due_heap = self._due
+        while due_heap and due_heap[0][0] <= now:
+            due, key = heapq.heappop(due_heap)
+            ticket = self._tickets.get(key[1])
+            # запись устарела: заявка уже удалена или её соседи изменились
+            if ticket is None or ticket.due != due:
+                continue
+            partner_key = self._best_partner(key, now)
+            if partner_key is not None:
+                matches.append(self._match(key, partner_key, now))
+            else:
+                self._schedule(key)
+        return matches
+
+
+def benchmark(queued: int = 100_000, matches: int = 200_000, step_seconds: float = 0.01,
+              seed: int = 0) -> dict[str, float]:
+    """
+    Замер: очередь поддерживается заполненной до queued игроков (вместо каждой составленной пары встают новые
+    игроки), модельное время идёт шагами по step_seconds, пока не будет составлено matches пар
+
+    :return: пар в секунду (по реальному времени работы очереди), медиана и 99-й перцентиль ожидания в модельных
+    секундах
+    """
+    rng = random.Random(seed)
+    # при 100 000 ожидающих соседи по рейтингу отличаются на тысячные доли очка, поэтому окно начинается с нуля
+    # и расширяется медленно
+    queue = MatchmakingQueue(base_window=0.0, widen_per_second=0.01)
+
+    def new_player() -> PlayerInfo:
+        # сила игрока по Эло определяет вероятность победы над игроком с рейтингом 1500
+        win_probability = 1 / (1 + 10 ** ((1500 - rng.gauss(1500, 300)) / 400))
+        games = rng.randint(10, 2000)
+        wins = min(games, max(0, round(rng.gauss(games * win_probability, (games / 4) ** 0.5))))
+        return PlayerInfo("player", wins, games - wins)
+
+    for _ in range(queued):
+        queue.enqueue(new_player(), 0.0)
+    waits = []
+    elapsed = 0.0
+    now = 0.0
+    while len(waits) < matches:
+        now += step_seconds
+        start = time.perf_counter()
+        waits.extend(match[2] for match in queue.poll(now))
+        while len(queue) < queued:
+            match = queue.enqueue(new_player(), now)
+            if match is not None:
+                waits.append(match[2])
+        elapsed += time.perf_counter() - start
+    waits.sort()
+    return {
+        'matches_per_second': len(waits) / elapsed,
+        'wait_p50': waits[len(waits) // 2],
+        'wait_p99': waits[int(len(waits) * 0.99)],
+        'matches': len(waits),
+    }
+
+
+if __name__ == "__main__":
+    queue = MatchmakingQueue()
+    print(queue.enqueue(PlayerInfo("something", 50, 20), now=0.0))
+    print(queue.enqueue(PlayerInfo("newbie", 0, 0), now=0.5))
+    pair = queue.enqueue(PlayerInfo("forsaken", 48, 21), now=1.0)
+    print(pair[0].nickname, pair[1].nickname, pair[2])
+    print(queue.enqueue(PlayerInfo("veteran", 40, 25), now=2.0), queue.poll(now=2.0))
+    pair = queue.poll(now=30.0)[0]
+    print(pair[0].nickname, pair[1].nickname, pair[2])
+
+    # поиск ближайшего соперника перебором списка ожидающих
+    rng = random.Random(0)
+    waiting = [PlayerInfo("player", rng.randint(0, 2000), rng.randint(0, 2000)) for _ in range(100_000)]
+    start = time.perf_counter()
+    for player in waiting[:100]:
+        rating = player_rating(player)
+        min((opponent for opponent in waiting if opponent is not player),
+            key=lambda opponent: abs(player_rating(opponent) - rating))
+    print(f"Перебор: {100 / (time.perf_counter() - start):,.0f} пар/с при 100 000 ожидающих")
+
+    result = benchmark()
+    print(f"{result['matches_per_second']:,.0f} пар/с при 100 000 ожидающих, ожидание: медиана "
+          f"{result['wait_p50']:.2f} с, 99-й перцентиль {result['wait_p99']:.2f} с")
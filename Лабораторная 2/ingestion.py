@@ -0,0 +1,235 @@
+"""
+Потоковая загрузка больших каталогов книг в библиотеку Library.
+
+Каталог - это строки JSON (JSON Lines) с полями записей BOOKS_DATABASE: {"id": 1, "name": "...", "pages": 200}.
+Каталог читается из локального файла или сокета (asyncio.StreamReader) пачками строк. Каждая пачка сразу
+отправляется в пул рабочих процессов, где строки разбираются и превращаются в книги через Book.__init__ (с его
+проверками), а будущий результат кладётся в ограниченную очередь. Когда в обработке находится max_pending пачек,
+чтение приостанавливается (при чтении из сокета источник тормозится механизмом управления потоком TCP), поэтому
+память, занятая конвейером, не зависит от размера каталога. Результаты применяются в порядке строк каталога:
+книги добавляются в конец library.books, а индекс "идентификатор -> позиция" обновляется по каждой пачке.
+
+Строки с ошибками не останавливают загрузку: они считаются, а первые max_errors из них сохраняются вместе с
+номерами строк и сообщениями исключений Book.
+
+Пример:
+    library = Library()
+    ingestor = CatalogIngestor(library)
+    print(asyncio.run(ingestor.ingest_file('catalog.jsonl')))
+"""
+import asyncio
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from typing import AsyncIterator, Callable, Optional
+
+from task2_classLibrary import Book, Library
+
+
+def build_batch(lines: list[bytes], first_line: int) -> tuple[list[Book], list[int], list[tuple[int, str]]]:
+    """
+    Разбирает пачку строк каталога и создаёт книги (выполняется в рабочем процессе)
+
+    :param lines: строки JSON
+    :param first_line: номер первой строки пачки в каталоге (с 1)
+
+    :return: созданные книги, номера их строк и список ошибок (номер строки, сообщение)
+    """
+    books = []
+    book_lines = []
+    errors = []
+    for line_number, line in enumerate(lines, first_line):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            books.append(Book(id_=record["id"], name=record["name"], pages=record["pages"]))
+            book_lines.append(line_number)
+        except KeyError as error:
+            errors.append((line_number, f"Нет поля {error}"))
+        except (ValueError, TypeError) as error:
+            errors.append((line_number, str(error)))
+    return books, book_lines, errors
+
+
+async def file_batches(path: str, batch_size: int) -> AsyncIterator[list[bytes]]:
+    """ Читает файл пачками по batch_size строк (чтение выполняется в потоке, чтобы не блокировать цикл событий) """
+    with open(path, 'rb') as file:
+        while True:
+            lines = await asyncio.to_thread(lambda: list(islice(file, batch_size)))
+            if not lines:
+                return
+            yield lines
+
+
+async def stream_batches(reader: asyncio.StreamReader, batch_size: int) -> AsyncIterator[list[bytes]]:
+    """ Читает поток (например, соединение с сокетом) пачками по batch_size строк до конца потока """
+    lines = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        lines.append(line)
+        if len(lines) == batch_size:
+            yield lines
+            lines = []
+    if lines:
+        yield lines
+
+
+class CatalogIngestor:
+    """ Конвейер загрузки каталогов книг в библиотеку """
+
+    def __init__(self, library: Optional[Library] = None, batch_size: int = 5000, max_pending: int = 8,
+                 workers: int = None, executor: Executor = None, max_errors: int = 100,
+                 on_batch: Callable[[list[Book]], None] = None):
+        """
+        Инициализация конвейера
+
+        :param library: библиотека, в которую добавляются книги (None - книги только передаются в on_batch)
+        :param batch_size: количество строк в пачке
+        :param max_pending: максимальное количество пачек в обработке (размер очереди)
+        :param workers: количество рабочих процессов (по умолчанию - количество процессоров)
+        :param executor: пул для обработки пачек; если не передан, на время загрузки создаётся пул процессов
+        :param max_errors: сколько ошибок сохранять с сообщениями
+        :param on_batch: функция, вызываемая с книгами каждой пачки после добавления в библиотеку
+
+        :raise ValueError: если batch_size или max_pending меньше 1, вызываем ошибку
+        """
+        if batch_size < 1 or max_pending < 1:
+            raise ValueError("Размер пачки и очереди должен быть положительным")
+        self.library = library
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.workers = workers or os.cpu_count()
+        self.executor = executor
+        self.max_errors = max_errors
+        self.on_batch = on_batch
+        self.index = {}
+        if library is not None:
+            self.index = {book.id_: position for position, book in enumerate(library.books)}
+        self.errors = []
+        self.error_count = 0
+
+    def _apply(self, books: list[Book], book_lines: list[int], errors: list[tuple[int, str]]) -> int:
+        """ Добавляет книги пачки в библиотеку и индекс; возвращает количество добавленных книг """
+        if self.library is not None:
+            positions = self.index
+            library_books = self.library.books
+            accepted = []
+            for book, line_number in zip(books, book_lines):
+                if book.id_ in positions:
+                    errors.append((line_number, "Книга с таким идентификатором уже есть в библиотеке"))
+                    continue
+                positions[book.id_] = len(library_books) + len(accepted)
+                accepted.append(book)
+            library_books.extend(accepted)
+            books = accepted
+        self.error_count += len(errors)
+        self.errors.extend(errors[:self.max_errors - len(self.errors)])
+        if self.on_batch is not None:
+            self.on_batch(books)
+        return len(books)
+
+    async def _ingest(self, batches: AsyncIterator[list[bytes]]) -> dict:
+        """ Загружает пачки строк; возвращает статистику загрузки """
+        loop = asyncio.get_running_loop()
+        executor = self.executor or ProcessPoolExecutor(self.workers)
+        queue = asyncio.Queue(self.max_pending)
+        stats = {'records': 0, 'books': 0, 'errors': 0}
+        start = time.perf_counter()
+
+        async def produce() -> None:
+            line = 1
+            async for lines in batches:
+                # put ждёт, пока в очереди не освободится место: так чтение не обгоняет обработку
+                await queue.put(loop.run_in_executor(executor, build_batch, lines, line))
+                line += len(lines)
+            stats['records'] = line - 1
+            await queue.put(None)
+
+        async def consume() -> None:
+            while (future := await queue.get()) is not None:
+                stats['books'] += self._apply(*await future)
+
+        errors_before = self.error_count
+        producer = asyncio.create_task(produce())
+        consumer = asyncio.create_task(consume())
+        try:
+            # ошибка любой из задач (чтения или on_batch) сразу прерывает загрузку
+            await asyncio.gather(producer, consumer)
+        finally:
+            # вторая задача не должна остаться висеть на очереди
+            producer.cancel()
+            consumer.cancel()
+            await asyncio.gather(producer, consumer, return_exceptions=True)
+            if self.executor is None:
+                executor.shutdown(cancel_futures=True)
+        stats['errors'] = self.error_count - errors_before
+        stats['seconds'] = time.perf_counter() - start
+        stats['records_per_second'] = stats['records'] / stats['seconds'] if stats['seconds'] else 0.0
+        return stats
+
+    async def ingest_file(self, path: str) -> dict:
+        """
+        Загружает каталог из файла JSON Lines
+
+        :return: статистика: records - прочитано строк, books - добавлено книг, errors - строк с ошибками,
+        seconds - время загрузки, records_per_second - скорость
+        """
+        return await self._ingest(file_batches(path, self.batch_size))
+
+    async def ingest_stream(self, reader: asyncio.StreamReader) -> dict:
+        """ Загружает каталог из потока до его конца (статистика - как у ingest_file) """
+        return await self._ingest(stream_batches(reader, self.batch_size))
+
+
+def write_catalog(path: str, records: int, broken_every: int = 0) -> None:
+    """ Записывает тестовый каталог из records строк; каждая broken_every-я строка содержит ошибку """
+    with open(path, 'w', encoding='utf-8') as file:
+        for id_ in range(1, records + 1):
+            pages = -1 if broken_every and id_ % broken_every == 0 else 100 + id_ % 900
+            file.write(json.dumps({"id": id_, "name": f"book_{id_}", "pages": pages}) + '\n')
+
+
+if __name__ == "__main__":
+    import resource
+
+    directory = tempfile.mkdtemp()
+    catalog_path = os.path.join(directory, 'catalog.jsonl')
+
+    write_catalog(catalog_path, 200_000, broken_every=50_000)
+    library = Library()
+    ingestor = CatalogIngestor(library)
+    print(asyncio.run(ingestor.ingest_file(catalog_path)))
+    print(ingestor.errors, len(library.books), ingestor.index[200_000 - 1])
+
+    async def serve_and_ingest() -> dict:
+        async def send_catalog(_, writer: asyncio.StreamWriter) -> None:
+            with open(catalog_path, 'rb') as file:
+                for line in islice(file, 10_000):
+                    writer.write(line)
+                    await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(send_catalog, '127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.sockets[0].getsockname()[1])
+        stats = await CatalogIngestor(Library()).ingest_stream(reader)
+        writer.close()
+        server.close()
+        return stats
+    print(asyncio.run(serve_and_ingest()))
+
+    # пиковая память процесса не растёт с размером каталога (книги только считаются и не сохраняются)
+    for records in (200_000, 1_000_000):
+        write_catalog(catalog_path, records)
+        counted = []
+        stats = asyncio.run(CatalogIngestor(on_batch=lambda books: counted.append(len(books))).ingest_file(catalog_path))
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(f"{records:>9} строк: {stats['records_per_second']:,.0f} строк/с, пик памяти процесса {peak / 1024:.1f} МБ, "
+              f"книг {sum(counted):,}")
+    os.remove(catalog_path)
+    os.rmdir(directory)
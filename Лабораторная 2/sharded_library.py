@@ -0,0 +1,285 @@
+"""
+Библиотека из task2_classLibrary.py, разделённая между несколькими процессами (шардами) по идентификатору книги.
+
+Книга с идентификатором id_ принадлежит шарду, номер которого получается из хеша id_, и хранится только в памяти
+процесса этого шарда: в его экземпляре Library и в словаре "идентификатор -> индекс в library.books".
+Для каждого шарда координатор хранит фильтр Блума с идентификаторами его книг. Если фильтр говорит, что книги на
+шарде нет, это точно так, и запрос к шарду не отправляется; ложные срабатывания (книги нет, а фильтр говорит, что
+может быть) возможны с вероятностью около false_positive_rate и стоят одного обращения к шарду.
+Пакетный поиск раскладывает идентификаторы по шардам, отправляет всем шардам запросы одновременно и собирает ответы
+в порядке исходных идентификаторов.
+"""
+import math
+import multiprocessing
+import random
+import time
+from multiprocessing.connection import Connection
+from typing import Iterable, Optional
+
+from task2_classLibrary import Book, Library
+
+""" Маска 64-битного числа для перемешивания хеша """
+MASK64 = (1 << 64) - 1
+
+
+def mix64(value: int) -> int:
+    """ Перемешивает биты целого числа (финализатор splitmix64), чтобы соседние идентификаторы давали разные хеши """
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+class BloomFilter:
+    """ Фильтр Блума для целочисленных идентификаторов """
+
+    def __init__(self, expected_items: int, false_positive_rate: float = 0.01):
+        """
+        Инициализация пустого фильтра с размером, рассчитанным на expected_items элементов
+
+        :param expected_items: ожидаемое количество элементов
+        :param false_positive_rate: допустимая вероятность ложного срабатывания (от 0 до 1)
+
+        :raise ValueError: если expected_items меньше 1 или false_positive_rate не в интервале (0, 1), вызываем ошибку
+        """
+        if expected_items < 1:
+            raise ValueError("Ожидаемое количество элементов должно быть положительным")
+        if not 0 < false_positive_rate < 1:
+            raise ValueError("Вероятность ложного срабатывания должна быть от 0 до 1")
+        self.size = max(8, math.ceil(-expected_items * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hashes_count = max(1, round(self.size / expected_items * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: int) -> Iterable[int]:
+        """ Номера битов элемента (двойное хеширование: h1 + i * h2) """
+        hash_value = mix64(item)
+        first, second = hash_value & 0xFFFFFFFF, (hash_value >> 32) | 1
+        size = self.size
+        return ((first + i * second) % size for i in range(self.hashes_count))
+
+    def add(self, item: int) -> None:
+        """ Добавляет элемент в фильтр """
+        bits = self._bits
+        for position in self._positions(item):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: int) -> bool:
+        """ False - элемента точно нет; True - элемент, вероятно, есть """
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+def _run_shard(connection: Connection) -> None:
+    """
+    Цикл процесса шарда: получает команду, выполняет её и отправляет результат
+
+    Команды:
+        ('add', books) - добавить книги в конец библиотеки шарда
+        ('get', book_ids) - вернуть книги по идентификаторам (None для отсутствующих)
+    """
+    library = Library()
+    positions = {}
+    while True:
+        command = connection.recv()
+        if command is None:
+            break
+        if command[0] == 'add':
+            for book in command[1]:
+                positions[book.id_] = len(library.books)
+                library.books.append(book)
+            connection.send(None)
+        else:
+            books = library.books
+            connection.send([books[positions[book_id]] if book_id in positions else None for book_id in command[1]])
+
+
+class ShardedLibrary:
+    """ Координатор библиотеки, разделённой на процессы-шарды по хешу id_ книги """
+
+    def __init__(self, shards_count: int = multiprocessing.cpu_count(), expected_books: int = 1_000_000,
+                 false_positive_rate: float = 0.01):
+        """
+        Запускает процессы шардов
+
+        :param shards_count: количество шардов (процессов)
+        :param expected_books: ожидаемое количество книг во всей библиотеке (для размера фильтров Блума; если книг
+                               будет больше, вероятность ложного срабатывания вырастет)
+        :param false_positive_rate: допустимая вероятность ложного срабатывания фильтра шарда
+
+        :raise ValueError: если количество шардов меньше 1, вызываем ошибку
+        """
+        if shards_count < 1:
+            raise ValueError("Количество шардов должно быть положительным")
+        self.shards_count = shards_count
+        self._filters = [BloomFilter(max(1, expected_books // shards_count), false_positive_rate)
+                         for _ in range(shards_count)]
+        self._connections = []
+        self._processes = []
+        for _ in range(shards_count):
+            parent_connection, child_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_run_shard, args=(child_connection,), daemon=True)
+            process.start()
+            self._connections.append(parent_connection)
+            self._processes.append(process)
+        self._size = 0
+        self.lookups = 0
+        self.filter_rejections = 0
+        self.shard_requests = 0
+
+    def __len__(self) -> int:
+        """ Количество книг во всех шардах """
+        return self._size
+
+    def shard_of(self, book_id: int) -> int:
+        """ Возвращает номер шарда, которому принадлежит книга с идентификатором book_id """
+        return (mix64(book_id) >> 32) % self.shards_count
+
+    def _fan_out(self, command: str, items_by_shard: dict[int, list]) -> dict[int, object]:
+        """ Отправляет команду с аргументами шардам одновременно и собирает ответы: {номер шарда: ответ} """
+        for shard, items in items_by_shard.items():
+            self._connections[shard].send((command, items))
+        self.shard_requests += len(items_by_shard)
+        return {shard: self._connections[shard].recv() for shard in items_by_shard}
+
+    def _lookup(self, book_ids: list[int]) -> list[Optional[Book]]:
+        """ Ищет книги по идентификаторам: фильтры Блума, затем параллельные запросы к шардам """
+        results = [None] * len(book_ids)
+        requests = {}
+        for position, book_id in enumerate(book_ids):
+            shard = self.shard_of(book_id)
+            if book_id in self._filters[shard]:
+                requests.setdefault(shard, ([], []))
+                requests[shard][0].append(position)
+                requests[shard][1].append(book_id)
+        self.lookups += len(book_ids)
+        self.filter_rejections += len(book_ids) - sum(len(ids) for _, ids in requests.values())
+        answers = self._fan_out('get', {shard: ids for shard, (_, ids) in requests.items()})
+        for shard, books in answers.items():
+            for position, book in zip(requests[shard][0], books):
+                results[position] = book
+        return results
+
+    @staticmethod
+    def _book_id_validation(book_id: int) -> None:
+        """
+        Проверяет идентификатор книги (как Library.get_index_by_book_id)
+
+        :raise TypeError: если идентификатор не является объектом типа int, вызываем ошибку
+        :raise ValueError: если идентификатор меньше или равен 0, вызываем ошибку
+        """
+        if not isinstance(book_id, int):
+            raise TypeError("Передаваемый идентификатор должен быть типа int")
+        if book_id <= 0:
+            raise ValueError("Идентификатор описывается положительным числом")
+
+    def add_books(self, books: list[Book]) -> None:
+        """
+        Добавляет книги на их шарды. Проверка на повтор идентификатора обращается только к шардам, фильтр которых
+        не исключает книгу
+
+        :param books: список книг (list объектов класса Book)
+
+        :raise TypeError: если какой-либо из элементов списка не является экземпляром класса Book, вызываем ошибку
+        :raise ValueError: если книга с таким идентификатором уже есть в библиотеке или идентификаторы в списке
+        повторяются, вызываем ошибку (ни одна книга списка не добавляется)
+        """
+        if not all(isinstance(book, Book) for book in books):
+            raise TypeError("Книги должны быть экземплярами класса Book")
+        book_ids = [book.id_ for book in books]
+        if len(set(book_ids)) != len(book_ids) or any(self._lookup(book_ids)):
+            raise ValueError("Книга с таким идентификатором уже есть в библиотеке")
+        books_by_shard = {}
+        for book in books:
+            shard = self.shard_of(book.id_)
+            books_by_shard.setdefault(shard, []).append(book)
+            self._filters[shard].add(book.id_)
+        self._fan_out('add', books_by_shard)
+        self._size += len(books)
+
+    def get_books(self, book_ids: list[int]) -> list[Optional[Book]]:
+        """
+        Пакетный поиск книг: запросы к шардам выполняются параллельно
+
+        :param book_ids: идентификаторы книг
+
+        :raise TypeError: если идентификатор не является объектом типа int, вызываем ошибку
+        :raise ValueError: если идентификатор меньше или равен 0, вызываем ошибку
+
+        :return: книги в порядке идентификаторов (None для отсутствующих книг)
+        """
+        for book_id in book_ids:
+            self._book_id_validation(book_id)
+        return self._lookup(book_ids)
+
+    def get_book(self, book_id: int) -> Book:
+        """
+        Возвращает книгу по идентификатору
+
+        :raise TypeError: если идентификатор не является объектом типа int, вызываем ошибку
+        :raise ValueError: если идентификатор меньше или равен 0 или книги с таким идентификатором нет, вызываем ошибку
+        """
+        book = self.get_books([book_id])[0]
+        if book is None:
+            raise ValueError("Книги с таким идентификатором нет в библиотеке")
+        return book
+
+    def __contains__(self, book_id: int) -> bool:
+        """ Есть ли в библиотеке книга с идентификатором book_id """
+        return self.get_books([book_id])[0] is not None
+
+    def stats(self) -> dict[str, int]:
+        """ Возвращает статистику поиска: сколько идентификаторов отсеяно фильтрами и сколько было запросов к шардам """
+        return {
+            'books': self._size,
+            'lookups': self.lookups,
+            'filter_rejections': self.filter_rejections,
+            'shard_requests': self.shard_requests,
+        }
+
+    def close(self) -> None:
+        """ Останавливает процессы шардов """
+        for connection in self._connections:
+            connection.send(None)
+        for process in self._processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    library = ShardedLibrary(shards_count=2, expected_books=1000)
+    library.add_books([Book(id_=1, name="test_name_1", pages=200), Book(id_=2, name="test_name_2", pages=400)])
+    print(library.get_books([2, 1, 3]), 3 in library, library.stats())
+    try:
+        library.add_books([Book(id_=2, name="test_name_2", pages=400)])
+    except ValueError as error:
+        print(error)
+    library.close()
+
+    # бенчмарк: 200 000 книг с чётными идентификаторами, поиск пачек, в которых половина идентификаторов отсутствует
+    rng = random.Random(0)
+    books = [Book(id_=id_, name=f"book_{id_}", pages=100) for id_ in range(2, 400_001, 2)]
+    missing_ids = [rng.randrange(1, 400_000, 2) for _ in range(200)]
+    plain_library = Library(books)
+    start = time.perf_counter()
+    for book_id in missing_ids:
+        try:
+            plain_library.get_index_by_book_id(book_id)
+        except ValueError:
+            pass
+    print(f"Library: {(time.perf_counter() - start) / len(missing_ids) * 1e6:.0f} мкс на отсутствующую книгу")
+
+    library = ShardedLibrary(shards_count=4, expected_books=len(books))
+    for chunk in range(0, len(books), 10_000):
+        library.add_books(books[chunk:chunk + 10_000])
+    start = time.perf_counter()
+    for book_id in missing_ids:
+        book_id in library
+    print(f"ShardedLibrary: {(time.perf_counter() - start) / len(missing_ids) * 1e6:.0f} мкс на отсутствующую книгу")
+
+    library.lookups = library.filter_rejections = library.shard_requests = 0
+    batches = [[rng.randrange(1, 400_001) for _ in range(10_000)] for _ in range(10)]
+    start = time.perf_counter()
+    for batch in batches:
+        library.get_books(batch)
+    elapsed = time.perf_counter() - start
+    print(f"Пакетный поиск: {len(batches) * 10_000 / elapsed:,.0f} идентификаторов/с, {library.stats()}")
+    library.close()
@@ -1,3 +1,6 @@
+from bisect import bisect_right
+from typing import Callable, Iterator, Optional
+
 BOOKS_DATABASE = [
     {
         "id": 1,
@@ -108,6 +111,157 @@ class Library:
             if book.id_ == book_id:
                 return index
 
+    def cursor(self) -> 'BookCursor':
+        """
+        Метод, возвращающий ленивый курсор по книгам библиотеки (список книг не копируется)
+
+        :return: курсор по всем книгам библиотеки, который можно сузить методами where, after, skip и limit
+        """
+        return BookCursor(self.books)
+
+
+class BookCursor:
+    def __init__(self, books: list[Book], predicates: tuple = (), after_id: Optional[int] = None, offset: int = 0,
+                 limit: Optional[int] = None):
+        """
+        Класс ленивого курсора по списку книг. Книги выбираются только при итерации, по одной, и работа
+        пропорциональна количеству просмотренных книг, а не размеру списка. Методы where, after, skip и limit
+        возвращают новый курсор и не изменяют исходный.
+
+        Пагинация по ключу (after) ищет место продолжения двоичным поиском, поэтому рассчитывает на то, что книги
+        хранятся по возрастанию идентификатора (как и get_next_book_id библиотеки)
+
+        :param books: список книг (не копируется)
+        :param predicates: условия отбора книг
+        :param after_id: выбирать книги с идентификатором больше этого
+        :param offset: сколько подходящих книг пропустить
+        :param limit: максимальное количество книг (None - без ограничения)
+        """
+        self._books = books
+        self._predicates = predicates
+        self._after_id = after_id
+        self._offset = offset
+        self._limit = limit
+
+    def _copy(self, **changes) -> 'BookCursor':
+        """
+        Метод, возвращающий копию курсора с изменёнными параметрами
+        """
+        parameters = {
+            'predicates': self._predicates,
+            'after_id': self._after_id,
+            'offset': self._offset,
+            'limit': self._limit,
+        }
+        parameters.update(changes)
+        return BookCursor(self._books, **parameters)
+
+    @staticmethod
+    def _count_validation(count: int) -> None:
+        """
+        Метод, проверяющий количество книг для skip и limit
+
+        :raise TypeError: если количество не является объектом типа int, вызываем ошибку
+        :raise ValueError: если количество отрицательное, вызываем ошибку
+        """
+        if not isinstance(count, int):
+            raise TypeError("Количество книг должно быть типа int")
+        if count < 0:
+            raise ValueError("Количество книг не может быть отрицательным")
+
+    def where(self, predicate: Callable[[Book], bool]) -> 'BookCursor':
+        """
+        Метод, добавляющий условие отбора книг
+
+        :param predicate: функция, принимающая книгу и возвращающая True для подходящих книг
+
+        :return: новый курсор
+        """
+        return self._copy(predicates=self._predicates + (predicate,))
+
+    def after(self, book_id: Optional[int]) -> 'BookCursor':
+        """
+        Метод для пагинации по ключу: выбирать книги с идентификатором больше book_id
+
+        :param book_id: идентификатор последней книги предыдущей страницы (None - с начала)
+
+        :raise TypeError: если идентификатор не является объектом типа int, вызываем ошибку
+
+        :return: новый курсор
+        """
+        if book_id is not None and not isinstance(book_id, int):
+            raise TypeError("Передаваемый идентификатор должен быть типа int")
+        return self._copy(after_id=book_id)
+
+    def skip(self, count: int) -> 'BookCursor':
+        """
+        Метод, задающий количество пропускаемых подходящих книг (offset)
+
+        :return: новый курсор
+        """
+        self._count_validation(count)
+        return self._copy(offset=count)
+
+    def limit(self, count: Optional[int]) -> 'BookCursor':
+        """
+        Метод, задающий максимальное количество книг (None - без ограничения)
+
+        :return: новый курсор
+        """
+        if count is not None:
+            self._count_validation(count)
+        return self._copy(limit=count)
+
+    def __iter__(self) -> Iterator[Book]:
+        """
+        Магический метод __iter__ - генератор книг курсора
+        """
+        books = self._books
+        start = 0
+        if self._after_id is not None:
+            start = bisect_right(books, self._after_id, key=lambda book: book.id_)
+        if not self._predicates:
+            # без условий отбора пропуск и ограничение - это просто границы индексов
+            start += self._offset
+            stop = len(books) if self._limit is None else min(len(books), start + self._limit)
+            for index in range(start, stop):
+                yield books[index]
+            return
+
+        skipped, remaining = self._offset, self._limit
+        if remaining == 0:
+            return
+        index = start
+        while index < len(books):
+            book = books[index]
+            index += 1
+            if not all(predicate(book) for predicate in self._predicates):
+                continue
+            if skipped:
+                skipped -= 1
+                continue
+            yield book
+            if remaining is not None:
+                remaining -= 1
+                if not remaining:
+                    return
+
+    def page(self) -> tuple[list[Book], Optional[int]]:
+        """
+        Метод, возвращающий страницу книг для пагинации по ключу
+
+        :raise ValueError: если для курсора не задан положительный limit, вызываем ошибку
+
+        :return: книги страницы и идентификатор для after следующей страницы (None, если страница последняя)
+        """
+        if not self._limit:
+            raise ValueError("Для страницы нужно задать положительный limit")
+        books = list(self._copy(limit=self._limit + 1))
+        if len(books) > self._limit:
+            books.pop()
+            return books, books[-1].id_
+        return books, None
+
 
 if __name__ == '__main__':
     empty_library = Library()  # инициализируем пустую библиотеку
@@ -120,3 +274,7 @@ if __name__ == '__main__':
     print(library_with_books.get_next_book_id())  # проверяем следующий id для непустой библиотеки
 
     print(library_with_books.get_index_by_book_id(1))  # проверяем индекс книги с id = 1
+
+    page, next_book_id = library_with_books.cursor().limit(1).page()  # первая страница из одной книги
+    print(page, next_book_id)
+    print(list(library_with_books.cursor().after(next_book_id).where(lambda book: book.pages > 300)))
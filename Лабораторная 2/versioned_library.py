@@ -0,0 +1,374 @@
+"""
+Версионная библиотека со снимками для конкурентного чтения (MVCC, copy-on-write).
+
+Книги и индекс "идентификатор книги -> позиция" хранятся в неизменяемых префиксных деревьях с 32 потомками в узле
+(ключ - целое число, каждый уровень дерева отвечает за 5 бит ключа). Изменение копирует только узлы на пути от
+корня к изменённому листу, остальные узлы новая версия разделяет со старой (structural sharing), поэтому снимок
+не копирует список книг, а добавление книги стоит O(log n).
+
+Читатели получают текущий снимок методом VersionedLibrary.snapshot() без блокировок: снимок неизменяем, и его
+список книг всегда согласован с его индексом. Писатель изменяет библиотеку в транзакции; узлы, созданные
+транзакцией, до её фиксации изменяются на месте (поэтому пачка книг в одной транзакции не копирует общий путь
+повторно), а фиксация публикует новую версию одним присваиванием ссылки. Писатели выполняются по очереди.
+
+Пример:
+    library = VersionedLibrary()
+    with library.transaction() as transaction:
+        transaction.append(Book(id_=1, name="test_name_1", pages=200))
+    snapshot = library.snapshot()
+    snapshot.get_index_by_book_id(1)
+"""
+import threading
+import time
+from typing import Iterator, Optional
+
+from task2_classLibrary import Book, Library
+
+""" Количество бит ключа на уровень дерева и количество потомков узла """
+BITS = 5
+WIDTH = 1 << BITS
+MASK = WIDTH - 1
+
+
+class _Node:
+    """ Узел префиксного дерева. Узел может изменять только транзакция-владелец, пока она не зафиксирована """
+
+    __slots__ = ('children', 'owner')
+
+    def __init__(self, children: list, owner: object):
+        self.children = children
+        self.owner = owner
+
+
+def _assoc(node: Optional[_Node], shift: int, key: int, value, owner: object) -> _Node:
+    """ Записывает значение по ключу в поддерево node; возвращает новый узел (или node, если он принадлежит owner) """
+    if node is None:
+        node = _Node([], owner)
+    elif node.owner is not owner:
+        node = _Node(node.children.copy(), owner)
+    children = node.children
+    index = (key >> shift) & MASK
+    if index >= len(children):
+        children.extend([None] * (index + 1 - len(children)))
+    if shift:
+        children[index] = _assoc(children[index], shift - BITS, key, value, owner)
+    else:
+        children[index] = value
+    return node
+
+
+def _iter_values(node: _Node, shift: int) -> Iterator:
+    """ Возвращает значения поддерева в порядке возрастания ключей """
+    if not shift:
+        yield from node.children
+        return
+    for child in node.children:
+        if child is not None:
+            yield from _iter_values(child, shift - BITS)
+
+
+class _RadixTrie:
+    """ Неизменяемое отображение "неотрицательное целое число -> значение" в виде префиксного дерева """
+
+    __slots__ = ('shift', 'root')
+
+    def __init__(self, shift: int = 0, root: Optional[_Node] = None):
+        """
+        :param shift: сдвиг ключа для корневого уровня (0 - корень является листом)
+        :param root: корневой узел (None для пустого дерева)
+        """
+        self.shift = shift
+        self.root = root
+
+    def get(self, key: int):
+        """ Возвращает значение по ключу или None, если ключа нет """
+        if key >> (self.shift + BITS):
+            return None
+        node = self.root
+        shift = self.shift
+        while node is not None:
+            children = node.children
+            index = (key >> shift) & MASK
+            if index >= len(children):
+                return None
+            if not shift:
+                return children[index]
+            node = children[index]
+            shift -= BITS
+        return None
+
+    def assoc(self, key: int, value, owner: object) -> '_RadixTrie':
+        """ Возвращает дерево, в котором по ключу key записано value (узлы владельца owner изменяются на месте) """
+        root, shift = self.root, self.shift
+        if root is not None:
+            while key >> (shift + BITS):
+                root = _Node([root], owner)
+                shift += BITS
+        else:
+            while key >> (shift + BITS):
+                shift += BITS
+        return _RadixTrie(shift, _assoc(root, shift, key, value, owner))
+
+    def values(self) -> Iterator:
+        """ Возвращает значения (вместе с пропусками None) в порядке возрастания ключей """
+        if self.root is not None:
+            yield from _iter_values(self.root, self.shift)
+
+
+class LibrarySnapshot:
+    """ Неизменяемый снимок библиотеки: список книг и согласованный с ним индекс по идентификаторам """
+
+    __slots__ = ('version', '_books', '_positions', '_size')
+
+    def __init__(self, version: int, books: _RadixTrie, positions: _RadixTrie, size: int):
+        """
+        Инициализация снимка (снимки создаёт VersionedLibrary)
+
+        :param version: номер версии библиотеки
+        :param books: дерево "позиция -> книга"
+        :param positions: дерево "идентификатор книги -> позиция"
+        :param size: количество книг
+        """
+        self.version = version
+        self._books = books
+        self._positions = positions
+        self._size = size
+
+    def __len__(self) -> int:
+        """ Количество книг в снимке """
+        return self._size
+
+    def __iter__(self) -> Iterator[Book]:
+        """ Книги снимка в порядке добавления """
+        values = self._books.values()
+        for _ in range(self._size):
+            yield next(values)
+
+    def __getitem__(self, index: int) -> Book:
+        """
+        Возвращает книгу по позиции (отрицательные позиции отсчитываются с конца)
+
+        :raise IndexError: если позиция вне диапазона, вызываем ошибку
+        """
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("Индекс книги вне диапазона")
+        return self._books.get(index)
+
+    def get_next_book_id(self) -> int:
+        """
+        Метод, возвращающий идентификатор для добавления новой книги в библиотеку (как Library.get_next_book_id)
+
+        :return: 1, если книг в снимке нет, в ином случае - идентификатор последней книги, увеличенный на 1
+        """
+        if not self._size:
+            return 1
+        return self[-1].id_ + 1
+
+    def get_index_by_book_id(self, book_id: int) -> int:
+        """
+        Метод, возвращающий индекс книги в снимке (как Library.get_index_by_book_id, но за O(log n))
+
+        :params book_id: идентификатор искомой книги (int)
+
+        :return: индекс книги с переданным идентификатором
+
+        :raise TypeError: если переданный идентификатор не является объектом типа int, вызываем ошибку
+        :raise ValueError: в случае, если переданный идентификатор меньше или равен 0 или книги с переданным
+        идентификатором нет в снимке, вызываем ошибку
+        """
+        if not isinstance(book_id, int):
+            raise TypeError("Передаваемый идентификатор должен быть типа int")
+        if book_id <= 0:
+            raise ValueError("Идентификатор описывается положительным числом")
+        index = self._positions.get(book_id)
+        if index is None:
+            raise ValueError("Книги с таким идентификатором нет в библиотеке")
+        return index
+
+    def get_book_by_id(self, book_id: int) -> Book:
+        """ Возвращает книгу по идентификатору (ошибки - как у get_index_by_book_id) """
+        return self._books.get(self.get_index_by_book_id(book_id))
+
+    def to_library(self) -> Library:
+        """ Возвращает обычную библиотеку Library с книгами снимка (копирует список книг) """
+        return Library(list(self))
+
+
+class LibraryTransaction:
+    """ Транзакция писателя: изменения видны читателям только после фиксации """
+
+    def __init__(self, library: 'VersionedLibrary'):
+        """
+        Инициализация транзакции (транзакции создаёт VersionedLibrary.transaction)
+
+        :param library: изменяемая библиотека
+        """
+        self._library = library
+        self._owner = None
+        self._base = None
+        self._books = None
+        self._positions = None
+        self._size = 0
+
+    def __enter__(self) -> 'LibraryTransaction':
+        """ Начинает транзакцию: ждёт завершения транзакций других писателей и берёт текущую версию """
+        self._library._write_lock.acquire()
+        self._owner = object()
+        self._base = self._library.snapshot()
+        self._books = self._base._books
+        self._positions = self._base._positions
+        self._size = len(self._base)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """ Фиксирует транзакцию или, если в ней возникло исключение, отменяет её """
+        try:
+            if exc_type is None:
+                self._library._head = LibrarySnapshot(self._base.version + 1, self._books, self._positions,
+                                                      self._size)
+        finally:
+            # без владельца узлы транзакции больше никто не изменит
+            self._owner = None
+            self._library._write_lock.release()
+
+    def __len__(self) -> int:
+        """ Количество книг с учётом изменений транзакции """
+        return self._size
+
+    def _check_active(self) -> None:
+        """ Проверяет, что транзакция начата и не завершена """
+        if self._owner is None:
+            raise RuntimeError("Транзакция не начата или уже завершена")
+
+    def append(self, book: Book) -> None:
+        """
+        Добавляет книгу в конец библиотеки
+
+        :raise TypeError: если передан не экземпляр класса Book, вызываем ошибку
+        :raise ValueError: если книга с таким идентификатором уже есть в библиотеке, вызываем ошибку
+        """
+        self._check_active()
+        if not isinstance(book, Book):
+            raise TypeError("Книги должны быть экземплярами класса Book")
+        if self._positions.get(book.id_) is not None:
+            raise ValueError("Книга с таким идентификатором уже есть в библиотеке")
+        self._books = self._books.assoc(self._size, book, self._owner)
+        self._positions = self._positions.assoc(book.id_, self._size, self._owner)
+        self._size += 1
+
+    def replace(self, book: Book) -> None:
+        """
+        Заменяет книгу с тем же идентификатором (позиция книги не меняется)
+
+        :raise TypeError: если передан не экземпляр класса Book, вызываем ошибку
+        :raise ValueError: если книги с таким идентификатором нет в библиотеке, вызываем ошибку
+        """
+        self._check_active()
+        if not isinstance(book, Book):
+            raise TypeError("Книги должны быть экземплярами класса Book")
+        index = self._positions.get(book.id_)
+        if index is None:
+            raise ValueError("Книги с таким идентификатором нет в библиотеке")
+        self._books = self._books.assoc(index, book, self._owner)
+
+
+class VersionedLibrary:
+    """ Библиотека с версиями: читатели работают со снимками, писатель фиксирует новые версии транзакциями """
+
+    def __init__(self, books: list[Book] = None):
+        """
+        Инициализация библиотеки (версия 0 содержит переданные книги)
+
+        :param books: список книг (list объектов класса Book)
+
+        :raise TypeError: если передан не список или какой-либо из элементов списка не является экземпляром класса
+        Book, вызываем ошибку
+        :raise ValueError: если идентификаторы книг повторяются, вызываем ошибку
+        """
+        if books is not None and not isinstance(books, list):
+            raise TypeError("Список книг должен быть типа list")
+        self._write_lock = threading.Lock()
+        self._head = LibrarySnapshot(-1, _RadixTrie(), _RadixTrie(), 0)
+        with self.transaction() as transaction:
+            for book in books or []:
+                transaction.append(book)
+
+    @classmethod
+    def from_library(cls, library: Library) -> 'VersionedLibrary':
+        """ Создаёт версионную библиотеку с книгами обычной библиотеки Library """
+        return cls(list(library.books))
+
+    @property
+    def version(self) -> int:
+        """ Номер текущей версии """
+        return self._head.version
+
+    def snapshot(self) -> LibrarySnapshot:
+        """ Возвращает снимок текущей версии (без блокировок и копирования) """
+        return self._head
+
+    def transaction(self) -> LibraryTransaction:
+        """
+        Возвращает транзакцию для использования в операторе with: при выходе из блока изменения фиксируются
+        новой версией, а если в блоке возникло исключение - отменяются
+        """
+        return LibraryTransaction(self)
+
+    def append(self, book: Book) -> LibrarySnapshot:
+        """ Добавляет одну книгу отдельной транзакцией (см. LibraryTransaction.append); возвращает новый снимок """
+        with self.transaction() as transaction:
+            transaction.append(book)
+        return self._head
+
+
+if __name__ == "__main__":
+    library = VersionedLibrary([Book(id_=1, name="test_name_1", pages=200), Book(id_=2, name="test_name_2", pages=400)])
+    old_snapshot = library.snapshot()
+    library.append(Book(id_=3, name="test_name_3", pages=100))
+    with library.transaction() as transaction:
+        transaction.replace(Book(id_=1, name="test_name_1 (2 издание)", pages=250))
+    print(old_snapshot.version, list(old_snapshot))
+    print(library.version, list(library.snapshot()), library.snapshot().get_index_by_book_id(3))
+
+    # бенчмарк: читатели ищут книги по идентификатору в снимках, пока писатель добавляет книги пачками по 100
+    library = VersionedLibrary([Book(id_=id_, name=f"book_{id_}", pages=100) for id_ in range(1, 100_001)])
+
+    def reader(duration: float, counts: list) -> None:
+        reads = 0
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            snapshot = library.snapshot()
+            last_book = snapshot[-1]
+            # список книг снимка согласован с его индексом
+            assert snapshot.get_index_by_book_id(last_book.id_) == len(snapshot) - 1
+            for book_id in range(1, 1001, 10):
+                snapshot.get_index_by_book_id(book_id)
+            reads += 101
+        counts.append(reads)
+
+    def writer(stop: threading.Event, commits: list) -> None:
+        while not stop.is_set():
+            with library.transaction() as transaction:
+                next_id = library.snapshot().get_next_book_id()
+                for id_ in range(next_id, next_id + 100):
+                    transaction.append(Book(id_=id_, name=f"book_{id_}", pages=100))
+            commits.append(1)
+            time.sleep(0.001)
+
+    for with_writer in (False, True):
+        counts, commits = [], []
+        stop = threading.Event()
+        threads = [threading.Thread(target=reader, args=(1.0, counts)) for _ in range(4)]
+        if with_writer:
+            threads.append(threading.Thread(target=writer, args=(stop, commits)))
+        for thread in threads:
+            thread.start()
+        for thread in threads[:4]:
+            thread.join()
+        stop.set()
+        for thread in threads[4:]:
+            thread.join()
+        print(f"{'С писателем' if with_writer else 'Без писателя'}: {sum(counts):,} чтений/с, "
+              f"фиксаций: {len(commits)}, книг: {len(library.snapshot()):,}")
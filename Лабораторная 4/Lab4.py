@@ -6,6 +6,7 @@
 атрибуты и методы, например: у мага есть мана и он может произносить заклинания, у воина - показатель выносливости
 в бою и возможность наносить удары противнику и т.п.
 """
+from typing import Optional
 
 
 class Character:
@@ -22,6 +23,21 @@ class Character:
     """ Величина, на которую увеличивается максимальное здоровье игрока после повышения на один уровень """
     BONUS_HP = 10
 
+    """ Количество здоровья, восстанавливаемое за один такт регенерации """
+    REGEN_HP = 5
+
+    """
+    Таблица прогрессии (см. progression.py). Если она не задана, на каждый уровень нужно XP_TO_PROMOTE опыта, а
+    характеристики растут на BONUS_HP, BONUS_MANA, BONUS_STAMINA за уровень
+    """
+    PROGRESSION = None
+
+    """
+    Характеристики, изменения которых отслеживаются для синхронизации с клиентами (см. sync.py). Методы, изменяющие
+    эти характеристики, отмечают их вызовом mark_changed()
+    """
+    SYNC_FIELDS = ('xp', 'current_hp', 'max_hp', 'lvl')
+
     def __init__(self, id_: int, name: str):
         """
         Инициализация класса Character. При вызове конструктора создаётся новый персонаж с переданными значениями
@@ -32,6 +48,8 @@ class Character:
         :param id_: уникальный идентификатор игрока
         :param name: никнейм игрока
         """
+        self._dirty_fields = set(self.SYNC_FIELDS)
+        self._sync_queue = None
         self._id_ = id_
         self.name = name
         self.xp = self.START_XP
@@ -115,6 +133,39 @@ class Character:
         """
         return f'Уровень: {self.lvl}\nОпыт: {self.xp}\nЗдоровье: {self.current_hp}\n'
 
+    def attach_sync_queue(self, sync_queue: Optional[list]) -> None:
+        """
+        Подключает очередь синхронизации: при первом изменении характеристик после синхронизации персонаж будет
+        добавлен в sync_queue. Если персонаж уже изменён, он добавляется в очередь сразу
+
+        :param sync_queue: список изменённых персонажей синхронизатора или None, чтобы отключить очередь
+        """
+        self._sync_queue = sync_queue
+        if sync_queue is not None and self._dirty_fields:
+            sync_queue.append(self)
+
+    def mark_changed(self, field: str) -> None:
+        """
+        Отмечает характеристику из SYNC_FIELDS изменённой. При первом изменении после синхронизации персонаж
+        добавляется в очередь синхронизации (если она подключена), поэтому синхронизатору не нужно обходить всех
+        персонажей
+
+        :param field: название изменённой характеристики
+        """
+        if not self._dirty_fields and self._sync_queue is not None:
+            self._sync_queue.append(self)
+        self._dirty_fields.add(field)
+
+    def pop_dirty_fields(self) -> set[str]:
+        """
+        Возвращает множество характеристик, изменённых с момента прошлой синхронизации, и сбрасывает его
+
+        :return: множество названий изменённых характеристик из SYNC_FIELDS
+        """
+        dirty_fields = self._dirty_fields
+        self._dirty_fields = set()
+        return dirty_fields
+
     def heal(self, healed_hp: int) -> None:
         """
         Симулирует восстановление здоровья на величину healed_hp. Если сумма текущего значения здоровья и
@@ -124,10 +175,13 @@ class Character:
                           healed_hp не пройдет валидацию в функции int_values_validation
         """
         if self.int_values_validation(healed_hp):
-            if self.current_hp + healed_hp > self.max_hp:
+            current_hp = self.current_hp
+            if current_hp + healed_hp > self.max_hp:
                 self.current_hp = self.max_hp
             else:
                 self.current_hp += healed_hp
+            if self.current_hp != current_hp:
+                self.mark_changed('current_hp')
 
     def get_damage(self, damaged_hp: int) -> None:
         """
@@ -143,24 +197,33 @@ class Character:
                 self.restart()
             else:
                 self.current_hp -= damaged_hp
+                self.mark_changed('current_hp')
 
     def get_xp(self, new_xp: int) -> None:
         """
         Получение опыта персонажем. Если кол-во опыта после получения превышает XP_TO_PROMOTE, то печатается сообщение
         о повышении уровня и вызывается метод level_up(). Новое текущее количество опыта рассчитывается, как остаток от
         целочисленного деления суммарного опыта на XP_TO_PROMOTE
+        Если задана таблица PROGRESSION, новый уровень и остаток опыта находятся по ней двоичным поиском, а level_up()
+        вызывается один раз сразу на все полученные уровни
 
         :param new_xp: количество полученного опыта. Если new_xp не целочисленное или меньше 0, то
                        new_xp не пройдет валидацию в функции int_values_validation
         """
         if self.int_values_validation(new_xp):
-            if new_xp + self.xp >= self.XP_TO_PROMOTE:
+            if self.PROGRESSION is not None:
+                new_lvl, self.xp = self.PROGRESSION.resolve(self.lvl, self.xp + new_xp)
+                if new_lvl > self.lvl:
+                    print(f"Новый уровень! Вы достигли {new_lvl} уровня")
+                    self.level_up(new_lvl - self.lvl)
+            elif new_xp + self.xp >= self.XP_TO_PROMOTE:
                 levels_to_promote = (new_xp + self.xp) // self.XP_TO_PROMOTE
                 self.xp = (new_xp + self.xp) % self.XP_TO_PROMOTE
                 print(f"Новый уровень! Вы достигли {self.lvl + levels_to_promote} уровня")
                 self.level_up(levels_to_promote)
             else:
                 self.xp += new_xp
+            self.mark_changed('xp')
 
     def level_up(self, levels_to_promote: int) -> None:
         """
@@ -172,8 +235,34 @@ class Character:
         """
         if self.int_values_validation(levels_to_promote):
             self.lvl += levels_to_promote
-            self.max_hp += self.BONUS_HP * levels_to_promote
+            self.max_hp += self.level_up_gain('hp', self.BONUS_HP, levels_to_promote)
             self.current_hp = self.max_hp
+            for field in ('lvl', 'max_hp', 'current_hp'):
+                self.mark_changed(field)
+
+    def level_up_gain(self, stat: str, bonus: int, levels_to_promote: int) -> int:
+        """
+        Возвращает прирост характеристики за последние levels_to_promote уровней (уровень уже повышен).
+        Без таблицы PROGRESSION прирост линейный - bonus за каждый уровень
+
+        :param stat: название характеристики в таблице прогрессии ('hp', 'mana', 'stamina')
+        :param bonus: прирост за один уровень без таблицы прогрессии
+        :param levels_to_promote: на сколько уровней был повышен персонаж
+
+        :return: суммарный прирост характеристики
+        """
+        if self.PROGRESSION is None:
+            return bonus * levels_to_promote
+        return self.PROGRESSION.stat_gain(stat, self.lvl - levels_to_promote, self.lvl)
+
+    def regenerate(self) -> None:
+        """
+        Один такт регенерации: восстанавливает REGEN_HP здоровья, но не больше max_hp (REGEN_HP = 0 отключает
+        регенерацию здоровья). Метод вызывается планировщиком регенерации (см. regeneration.py), а не опросом
+        каждого персонажа
+        """
+        if self.REGEN_HP and self.current_hp < self.max_hp:
+            self.heal(self.REGEN_HP)
 
     def restart(self) -> None:
         """
@@ -183,6 +272,23 @@ class Character:
         self.current_hp = self.START_HP
         self.max_hp = self.START_HP
         self.lvl = self.START_LVL
+        for field in Character.SYNC_FIELDS:
+            self.mark_changed(field)
+
+    def reuse(self, id_: int, name: str) -> None:
+        """
+        Подготавливает объект персонажа к повторному использованию для другого игрока (см. pool.py): характеристики
+        сбрасываются методом restart(), а идентификатор и никнейм заменяются. Все синхронизируемые характеристики
+        отмечаются изменёнными, как у только что созданного персонажа
+
+        :param id_: уникальный идентификатор нового игрока
+        :param name: никнейм нового игрока
+        """
+        self.restart()
+        self._id_ = id_
+        self.name = name
+        self._sync_queue = None
+        self._dirty_fields = set(self.SYNC_FIELDS)
 
 
 class Magician(Character):
@@ -194,9 +300,18 @@ class Magician(Character):
     """ Величина, на которую увеличивается максимальная мана при повышении на один уровень """
     BONUS_MANA = 10
 
+    """ Количество маны, восстанавливаемое за один такт регенерации """
+    REGEN_MANA = 5
+
+    """ Для мага дополнительно синхронизируется мана """
+    SYNC_FIELDS = Character.SYNC_FIELDS + ('current_mana', 'max_mana')
+
     """ Заклинания, которые может кастовать маг: ключи - названия заклинаний, значения - количество требуемой маны """
     SPELLS = {'Attack Spell': 30, 'Shield Spell': 20, 'Teleport Spell': 50}
 
+    """ Урон, который заклинание наносит противнику (0 - заклинание не атакующее) """
+    SPELL_DAMAGE = {'Attack Spell': 25, 'Shield Spell': 0, 'Teleport Spell': 0}
+
     def __init__(self, id_: int, name: str):
         """
         Инициализация класса Magician. При вызове конструктора создаётся новый персонаж роли Magician.
@@ -237,6 +352,8 @@ class Magician(Character):
         super().restart()
         self.current_mana = self.START_MANA
         self.max_mana = self.START_MANA
+        self.mark_changed('current_mana')
+        self.mark_changed('max_mana')
 
     def level_up(self, levels_to_promote: int) -> None:
         """
@@ -248,8 +365,20 @@ class Magician(Character):
                        levels_to_promote не пройдет валидацию в функции int_values_validation
         """
         super().level_up(levels_to_promote)
-        self.max_mana += self.BONUS_MANA * levels_to_promote
+        self.max_mana += self.level_up_gain('mana', self.BONUS_MANA, levels_to_promote)
         self.current_mana = self.max_mana
+        self.mark_changed('max_mana')
+        self.mark_changed('current_mana')
+
+    def regenerate(self) -> None:
+        """
+        Один такт регенерации. Перегрузка для класса Magician - помимо здоровья восстанавливается REGEN_MANA маны,
+        но не больше max_mana
+        """
+        super().regenerate()
+        if self.current_mana < self.max_mana:
+            self.current_mana = min(self.current_mana + self.REGEN_MANA, self.max_mana)
+            self.mark_changed('current_mana')
 
     def cast_the_spell(self, spell: str) -> None:
         """
@@ -261,11 +390,13 @@ class Magician(Character):
         :raise ValueError: вызываем ошибку, если заклинания spell нет в словаре SPELLS или если текущее кол-во маны
                            меньше, чем значение в словаре SPELLS по ключу spell
         """
-        if spell not in self.SPELLS.keys():
+        cost = self.SPELLS.get(spell)
+        if cost is None:
             raise ValueError("Такого заклинания не существует")
-        if self.SPELLS[spell] > self.current_mana:
+        if cost > self.current_mana:
             raise ValueError("Недостаточно маны для заклинания")
-        self.current_mana -= self.SPELLS[spell]
+        self.current_mana -= cost
+        self.mark_changed('current_mana')
 
 
 class Warrior(Character):
@@ -277,9 +408,18 @@ class Warrior(Character):
     """ Величина, на которую увеличивается максимальная выносливость при повышении на один уровень """
     BONUS_STAMINA = 10
 
+    """ Количество выносливости, восстанавливаемое за один такт регенерации """
+    REGEN_STAMINA = 5
+
+    """ Для воина дополнительно синхронизируется выносливость """
+    SYNC_FIELDS = Character.SYNC_FIELDS + ('current_stamina', 'max_stamina')
+
     """ Удары, которые может наносить воин: ключи - тип удара, значения - количество требуемой выносливости """
     HITS = {'Light Hit': 15, 'Heavy Hit': 30, 'Ultimate Hit': 55}
 
+    """ Урон, который удар наносит противнику """
+    HIT_DAMAGE = {'Light Hit': 10, 'Heavy Hit': 20, 'Ultimate Hit': 40}
+
     def __init__(self, id_: int, name: str):
         """
         Инициализация класса Warrior. При вызове конструктора создаётся новый персонаж роли Warrior.
@@ -320,6 +460,8 @@ class Warrior(Character):
         super().restart()
         self.current_stamina = self.START_STAMINA
         self.max_stamina = self.START_STAMINA
+        self.mark_changed('current_stamina')
+        self.mark_changed('max_stamina')
 
     def level_up(self, levels_to_promote: int) -> None:
         """
@@ -331,8 +473,20 @@ class Warrior(Character):
                        levels_to_promote не пройдет валидацию в функции int_values_validation
         """
         super().level_up(levels_to_promote)
-        self.max_stamina += self.BONUS_STAMINA * levels_to_promote
+        self.max_stamina += self.level_up_gain('stamina', self.BONUS_STAMINA, levels_to_promote)
         self.current_stamina = self.max_stamina
+        self.mark_changed('max_stamina')
+        self.mark_changed('current_stamina')
+
+    def regenerate(self) -> None:
+        """
+        Один такт регенерации. Перегрузка для класса Warrior - помимо здоровья восстанавливается REGEN_STAMINA
+        выносливости, но не больше max_stamina
+        """
+        super().regenerate()
+        if self.current_stamina < self.max_stamina:
+            self.current_stamina = min(self.current_stamina + self.REGEN_STAMINA, self.max_stamina)
+            self.mark_changed('current_stamina')
 
     def hit_the_enemy(self, hit: str) -> None:
         """
@@ -344,11 +498,13 @@ class Warrior(Character):
         :raise ValueError: вызываем ошибку, если удара hit нет в словаре HITS или если текущее кол-во выносливости
                            меньше, чем значение в словаре HITS по ключу hit
         """
-        if hit not in self.HITS.keys():
+        cost = self.HITS.get(hit)
+        if cost is None:
             raise ValueError("Такого удара не существует")
-        if self.HITS[hit] > self.current_stamina:
+        if cost > self.current_stamina:
             raise ValueError("Недостаточно выносливости для удара")
-        self.current_stamina -= self.HITS[hit]
+        self.current_stamina -= cost
+        self.mark_changed('current_stamina')
 
 
 if __name__ == "__main__":
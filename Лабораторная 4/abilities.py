@@ -0,0 +1,205 @@
+"""
+Реестр способностей персонажей из Lab4.py с целочисленными идентификаторами.
+
+Словари Magician.SPELLS и Warrior.HITS (и способности будущих ролей) один раз компилируются в реестр: каждой
+способности присваивается целочисленный идентификатор, а её стоимость и расходуемый ресурс хранятся в массивах,
+индексируемых этим идентификатором. Клиент передаёт идентификатор вместо строки, поэтому при использовании
+способности не нужно хешировать её название. Пакетное выполнение принимает списки пар (персонаж, идентификатор),
+группирует их по способности и подсчитывает использования каждого персонажа средствами стандартной библиотеки
+(collections.Counter, itertools.compress), после чего списывает ресурс персонажа одной записью. Пары проходятся
+по порядку в Python только для персонажей, у которых есть ошибка (нет способности у роли, не хватает ресурса),
+с теми же сообщениями ValueError, что и у cast_the_spell и hit_the_enemy. Одиночную способность быстрее
+использовать методом роли (cast_the_spell, hit_the_enemy), поэтому реестр выполняет только пачки.
+"""
+import operator
+import time
+from array import array
+from collections import Counter
+from itertools import compress, count, repeat
+from typing import Optional
+
+from Lab4 import Magician, Warrior
+
+
+class AbilityRegistry:
+    """ Реестр способностей: идентификатор способности -> роль, название, стоимость и расходуемый ресурс """
+
+    def __init__(self):
+        """ Инициализация пустого реестра """
+        self._ids = {}
+        self._names = []
+        self._costs = array('q')
+        self._messages = {}
+        # идентификатор способности -> (роль, ресурс, стоимость, сообщение о нехватке ресурса)
+        self._abilities = []
+
+    def __len__(self) -> int:
+        """ Количество способностей в реестре """
+        return len(self._names)
+
+    def register_role(self, role: type, abilities: dict[str, int], resource: str,
+                      unknown_message: str, insufficient_message: str) -> list[int]:
+        """
+        Компилирует способности роли в реестр
+
+        :param role: класс роли (например, Magician)
+        :param abilities: словарь {название способности: стоимость}, например Magician.SPELLS
+        :param resource: название атрибута, из которого списывается стоимость (например, 'current_mana')
+        :param unknown_message: сообщение ValueError для способности, которой нет у роли
+        :param insufficient_message: сообщение ValueError при нехватке ресурса
+
+        :raise ValueError: если роль уже зарегистрирована, вызываем ошибку
+
+        :return: идентификаторы способностей роли в порядке словаря abilities
+        """
+        if role in self._messages:
+            raise ValueError("Способности этой роли уже зарегистрированы")
+        self._messages[role] = (unknown_message, insufficient_message)
+        ability_ids = []
+        for name, cost in abilities.items():
+            ability_id = len(self._names)
+            self._ids[role, name] = ability_id
+            self._names.append(name)
+            self._costs.append(cost)
+            self._abilities.append((role, resource, cost, insufficient_message))
+            ability_ids.append(ability_id)
+        return ability_ids
+
+    def ability_id(self, role: type, name: str) -> int:
+        """
+        Возвращает идентификатор способности роли (вызывается один раз, например при загрузке клиента)
+
+        :raise ValueError: если у роли нет такой способности, вызываем ошибку с сообщением роли
+        """
+        ability_id = self._ids.get((role, name))
+        if ability_id is None:
+            unknown_message = self._messages.get(role, ("Такой способности не существует",))[0]
+            raise ValueError(unknown_message)
+        return ability_id
+
+    def name(self, ability_id: int) -> str:
+        """ Возвращает название способности по идентификатору """
+        return self._names[ability_id]
+
+    def cost(self, ability_id: int) -> int:
+        """ Возвращает стоимость способности по идентификатору """
+        return self._costs[ability_id]
+
+    def _unknown_error(self, character) -> ValueError:
+        """ Возвращает ошибку для способности, которой нет у роли персонажа (с сообщением его роли) """
+        for role, (unknown_message, _) in self._messages.items():
+            if isinstance(character, role):
+                return ValueError(unknown_message)
+        return ValueError("Такой способности не существует")
+
+    def _is_valid(self, character, ability_id) -> bool:
+        """ Есть ли способность ability_id у роли персонажа """
+        return (isinstance(ability_id, int) and 0 <= ability_id < len(self._abilities)
+                and isinstance(character, self._abilities[ability_id][0]))
+
+    def execute_batch(self, characters: list, ability_ids: list[int]) -> list[Optional[ValueError]]:
+        """
+        Пакетно использует способности: characters[i] использует ability_ids[i]. Результат такой же, как при
+        последовательных вызовах методов ролей: несколько способностей одного персонажа списываются по порядку.
+
+        Пары группируются по способности, и для каждой способности Counter считает, сколько раз её использует каждый
+        персонаж. Если суммарной стоимости хватает, ресурс персонажа уменьшается на неё одной записью. Пары персонажей,
+        у которых есть недоступная способность или не хватает ресурса, обрабатываются по порядку отдельным проходом
+
+        :param characters: список персонажей
+        :param ability_ids: список идентификаторов способностей той же длины
+
+        :raise ValueError: если длины списков не совпадают, вызываем ошибку
+
+        :return: список ошибок ValueError (None для успешно использованных способностей)
+        """
+        if len(characters) != len(ability_ids):
+            raise ValueError("Количество персонажей и способностей в пачке должно совпадать")
+        errors = [None] * len(characters)
+        distinct_ids = set(ability_ids)
+        # (персонаж, ресурс) -> суммарная стоимость способностей персонажа в пачке
+        totals = {}
+        # персонажи, пары которых нужно обработать по порядку
+        ordered = set()
+        for ability_id in distinct_ids:
+            if len(distinct_ids) == 1:
+                selected = characters
+            else:
+                selected = compress(characters, map(operator.eq, repeat(ability_id), ability_ids))
+            for character, uses in Counter(selected).items():
+                if not self._is_valid(character, ability_id):
+                    ordered.add(character)
+                    continue
+                _, resource, cost, _ = self._abilities[ability_id]
+                totals[character, resource] = totals.get((character, resource), 0) + uses * cost
+        for (character, resource), total in totals.items():
+            if total > getattr(character, resource):
+                ordered.add(character)
+        for (character, resource), total in totals.items():
+            if total and character not in ordered:
+                setattr(character, resource, getattr(character, resource) - total)
+                character.mark_changed(resource)
+        if ordered:
+            self._execute_ordered(characters, ability_ids, ordered, errors)
+        return errors
+
+    def _execute_ordered(self, characters: list, ability_ids: list[int], ordered: set,
+                         errors: list[Optional[ValueError]]) -> None:
+        """ Обрабатывает по порядку пары пачки, персонажи которых входят в ordered, записывая ошибки в errors """
+        # текущие значения ресурсов: (персонаж, ресурс) -> значение
+        balances = {}
+        for index in compress(count(), map(ordered.__contains__, characters)):
+            character = characters[index]
+            ability_id = ability_ids[index]
+            if not self._is_valid(character, ability_id):
+                errors[index] = self._unknown_error(character)
+                continue
+            _, resource, cost, insufficient_message = self._abilities[ability_id]
+            value = balances.get((character, resource))
+            if value is None:
+                value = getattr(character, resource)
+            if cost > value:
+                errors[index] = ValueError(insufficient_message)
+            else:
+                balances[character, resource] = value - cost
+        for (character, resource), value in balances.items():
+            if getattr(character, resource) != value:
+                setattr(character, resource, value)
+                character.mark_changed(resource)
+
+
+def compile_registry() -> AbilityRegistry:
+    """ Компилирует реестр со способностями ролей Magician и Warrior """
+    registry = AbilityRegistry()
+    registry.register_role(Magician, Magician.SPELLS, 'current_mana',
+                           "Такого заклинания не существует", "Недостаточно маны для заклинания")
+    registry.register_role(Warrior, Warrior.HITS, 'current_stamina',
+                           "Такого удара не существует", "Недостаточно выносливости для удара")
+    return registry
+
+
+if __name__ == "__main__":
+    registry = compile_registry()
+    magician = Magician(id_=53642, name="MasterMerlin")
+    warrior = Warrior(id_=53643, name="TrollSlayer")
+    attack_spell = registry.ability_id(Magician, 'Attack Spell')
+    ultimate_hit = registry.ability_id(Warrior, 'Ultimate Hit')
+    print(registry.execute_batch([magician, warrior, warrior, magician],
+                                 [attack_spell, ultimate_hit, ultimate_hit, ultimate_hit]))
+    print(magician.get_current_characteristics())
+    print(warrior.get_current_characteristics())
+
+    # бенчмарк: 1 000 000 лёгких ударов пачкой и по одному через hit_the_enemy
+    warriors = [Warrior(id_=id_, name=f"Player{id_}") for id_ in range(1000)]
+    light_hit = registry.ability_id(Warrior, 'Light Hit')
+    batch_characters = warriors * 1000
+    batch_ids = [light_hit] * len(batch_characters)
+    for warrior in warriors:
+        warrior.current_stamina = 10 ** 9
+    start = time.perf_counter()
+    registry.execute_batch(batch_characters, batch_ids)
+    batched = time.perf_counter()
+    for warrior in batch_characters:
+        warrior.hit_the_enemy('Light Hit')
+    finished = time.perf_counter()
+    print(f"Пачкой: {batched - start:.2f} с, по одному: {finished - batched:.2f} с")
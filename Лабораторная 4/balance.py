@@ -0,0 +1,242 @@
+"""
+Симулятор боёв методом Монте-Карло для подбора баланса ролей Magician и Warrior из Lab4.py.
+
+Бои идут по правилам классов: ресурс тратят cast_the_spell и hit_the_enemy, урон наносится через get_damage,
+уровни выдаются через level_up. Параметры баланса (SPELLS, HITS, START_MANA, START_STAMINA, BONUS_HP и др.)
+переопределяются в подклассах, созданных для каждого варианта настроек. Бои распределяются по процессам пачками,
+у каждой пачки своё детерминированное начальное значение генератора, поэтому результат не зависит от количества
+процессов.
+"""
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Optional
+
+from Lab4 import Character, Magician, Warrior
+
+""" Количество боёв в одной пачке, отправляемой процессу """
+CHUNK_SIZE = 2000
+
+
+def make_role(base_class: type, overrides: Optional[dict] = None) -> type:
+    """
+    Создаёт подкласс роли с переопределёнными параметрами баланса
+
+    :param base_class: Magician или Warrior
+    :param overrides: словарь {атрибут класса: значение}, например {'START_MANA': 150}
+
+    :raise AttributeError: если у класса нет переопределяемого атрибута, вызываем ошибку
+
+    :return: подкласс base_class
+    """
+    overrides = overrides or {}
+    for attribute in overrides:
+        if not hasattr(base_class, attribute):
+            raise AttributeError(f"У класса {base_class.__name__} нет атрибута {attribute}")
+    return type(base_class.__name__, (base_class,), dict(overrides))
+
+
+def _attacks(character: Character) -> dict[str, tuple[int, int]]:
+    """ Возвращает атакующие способности персонажа: {способность: (стоимость, урон)} """
+    if isinstance(character, Magician):
+        return {spell: (cost, character.SPELL_DAMAGE[spell]) for spell, cost in character.SPELLS.items()
+                if character.SPELL_DAMAGE.get(spell)}
+    return {hit: (cost, character.HIT_DAMAGE[hit]) for hit, cost in character.HITS.items()
+            if character.HIT_DAMAGE.get(hit)}
+
+
+def _take_turn(attacker: Character, target: Character, attacks: dict, rng: random.Random) -> bool:
+    """
+    Ход атакующего: случайная атака из тех, на которые хватает ресурса, или регенерация, если не хватает ни на одну.
+    Смертельный урон (больше текущего здоровья) не передаётся в get_damage, потому что тот перезапускает персонажа:
+    бой в этом случае просто заканчивается
+
+    :return: True, если цель погибла
+    """
+    resource = attacker.current_mana if isinstance(attacker, Magician) else attacker.current_stamina
+    affordable = [ability for ability, (cost, _) in attacks.items() if cost <= resource]
+    if not affordable:
+        attacker.regenerate()
+        return False
+    ability = rng.choice(affordable)
+    if isinstance(attacker, Magician):
+        attacker.cast_the_spell(ability)
+    else:
+        attacker.hit_the_enemy(ability)
+    damage = attacks[ability][1]
+    if damage > target.current_hp:
+        return True
+    target.get_damage(damage)
+    return False
+
+
+def duel(magician: Magician, warrior: Warrior, rng: random.Random, max_turns: int = 500) -> tuple[Optional[str], int]:
+    """
+    Дуэль мага и воина. Первым ходит случайно выбранный участник, дальше ходы чередуются
+
+    :return: имя класса победителя (None - ничья по max_turns) и количество ходов до победы
+    """
+    fighters = [(magician, warrior, _attacks(magician)), (warrior, magician, _attacks(warrior))]
+    if rng.random() < 0.5:
+        fighters.reverse()
+    for turn in range(1, max_turns + 1):
+        attacker, target, attacks = fighters[turn % 2]
+        if _take_turn(attacker, target, attacks, rng):
+            return attacker.__class__.__name__, turn
+    return None, max_turns
+
+
+def skirmish(magicians: list[Magician], warriors: list[Warrior], rng: random.Random,
+             max_rounds: int = 500) -> tuple[Optional[str], int]:
+    """
+    Групповой бой: в каждом раунде каждый живой участник в случайном порядке атакует случайного живого противника
+
+    :return: имя класса победившей команды (None - ничья по max_rounds) и количество раундов
+    """
+    alive = {id(character): character for character in magicians + warriors}
+    attacks = {id(character): _attacks(character) for character in alive.values()}
+    for round_number in range(1, max_rounds + 1):
+        order = list(alive.values())
+        rng.shuffle(order)
+        for attacker in order:
+            if id(attacker) not in alive:
+                continue
+            enemies = [character for character in alive.values() if type(character) is not type(attacker)]
+            if not enemies:
+                return attacker.__class__.__name__, round_number
+            target = rng.choice(enemies)
+            if _take_turn(attacker, target, attacks[id(attacker)], rng):
+                del alive[id(target)]
+        classes = {character.__class__.__name__ for character in alive.values()}
+        if len(classes) == 1:
+            return classes.pop(), round_number
+    return None, max_rounds
+
+
+def _simulate_chunk(magician_overrides: dict, warrior_overrides: dict, team_size: int, max_level: int,
+                    fights: int, seed: int) -> tuple[Counter, Counter]:
+    """
+    Проводит пачку боёв в процессе пула. Уровни участников выбираются случайно от 1 до max_level
+
+    :return: счётчик побед по классам и гистограмма длительности боёв (в ходах или раундах)
+    """
+    rng = random.Random(seed)
+    magician_class = make_role(Magician, magician_overrides)
+    warrior_class = make_role(Warrior, warrior_overrides)
+    wins = Counter()
+    time_to_kill = Counter()
+    for fight in range(fights):
+        teams = []
+        for role in (magician_class, warrior_class):
+            team = []
+            for member in range(team_size):
+                character = role(id_=fight * team_size * 2 + member, name="Bot")
+                level = rng.randint(1, max_level)
+                if level > 1:
+                    character.level_up(level - 1)
+                team.append(character)
+            teams.append(team)
+        if team_size == 1:
+            winner, turns = duel(teams[0][0], teams[1][0], rng)
+        else:
+            winner, turns = skirmish(teams[0], teams[1], rng)
+        wins[winner] += 1
+        time_to_kill[turns] += 1
+    return wins, time_to_kill
+
+
+def _percentile(histogram: Counter, fraction: float) -> int:
+    """ Возвращает перцентиль по гистограмме {значение: количество} """
+    threshold = sum(histogram.values()) * fraction
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if seen >= threshold:
+            return value
+    return 0
+
+
+def simulate(fights: int, magician_overrides: Optional[dict] = None, warrior_overrides: Optional[dict] = None,
+             team_size: int = 1, max_level: int = 1, seed: int = 0,
+             executor: Optional[ProcessPoolExecutor] = None) -> dict:
+    """
+    Проводит fights боёв и собирает статистику
+
+    :param fights: количество боёв
+    :param magician_overrides: переопределения параметров класса Magician
+    :param warrior_overrides: переопределения параметров класса Warrior
+    :param team_size: размер команд (1 - дуэль)
+    :param max_level: максимальный случайный уровень участников
+    :param seed: начальное значение; пачка номер i использует seed * 1_000_003 + i
+    :param executor: пул процессов. Если не передан, бои проводятся в текущем процессе
+
+    :return: словарь с долей побед мага и воина, долей ничьих, p50/p90 длительности боя и гистограммой длительности
+    """
+    chunks = [(magician_overrides or {}, warrior_overrides or {}, team_size, max_level,
+               min(CHUNK_SIZE, fights - start), seed * 1_000_003 + index)
+              for index, start in enumerate(range(0, fights, CHUNK_SIZE))]
+    if executor is None:
+        results = [_simulate_chunk(*chunk) for chunk in chunks]
+    else:
+        results = list(executor.map(_simulate_chunk, *zip(*chunks)))
+    wins = Counter()
+    time_to_kill = Counter()
+    for chunk_wins, chunk_time_to_kill in results:
+        wins.update(chunk_wins)
+        time_to_kill.update(chunk_time_to_kill)
+    return {
+        'magician_win_rate': wins['Magician'] / fights,
+        'warrior_win_rate': wins['Warrior'] / fights,
+        'draw_rate': wins[None] / fights,
+        'time_to_kill_p50': _percentile(time_to_kill, 0.5),
+        'time_to_kill_p90': _percentile(time_to_kill, 0.9),
+        'time_to_kill_histogram': dict(sorted(time_to_kill.items())),
+    }
+
+
+def balance_sweep(fights: int, magician_grid: dict[str, list], warrior_grid: dict[str, list],
+                  executor: ProcessPoolExecutor, **simulate_kwargs) -> list[tuple[dict, dict, dict]]:
+    """
+    Перебирает все сочетания значений параметров из сеток и для каждого проводит simulate
+
+    :param fights: количество боёв на каждое сочетание
+    :param magician_grid: {атрибут Magician: список значений}
+    :param warrior_grid: {атрибут Warrior: список значений}
+    :param executor: пул процессов
+
+    :return: список (переопределения мага, переопределения воина, статистика)
+    """
+    report = []
+    for magician_values in product(*magician_grid.values()):
+        magician_overrides = dict(zip(magician_grid, magician_values))
+        for warrior_values in product(*warrior_grid.values()):
+            warrior_overrides = dict(zip(warrior_grid, warrior_values))
+            stats = simulate(fights, magician_overrides, warrior_overrides, executor=executor, **simulate_kwargs)
+            report.append((magician_overrides, warrior_overrides, stats))
+    return report
+
+
+if __name__ == "__main__":
+    # с настройками по умолчанию регенерация здоровья в простое перекрывает урон и большинство дуэлей
+    # заканчивается ничьей, поэтому в примерах регенерация здоровья в бою отключена
+    no_hp_regen = {'REGEN_HP': 0}
+    with ProcessPoolExecutor() as pool:
+        print(f"Ничьи с регенерацией здоровья: {simulate(2000, executor=pool)['draw_rate']:.3f}")
+
+        start = time.perf_counter()
+        duels = simulate(100_000, no_hp_regen, no_hp_regen, max_level=5, executor=pool)
+        elapsed = time.perf_counter() - start
+        print(f"100000 дуэлей за {elapsed:.2f} с: маг {duels['magician_win_rate']:.3f}, "
+              f"воин {duels['warrior_win_rate']:.3f}, ничьи {duels['draw_rate']:.3f}, "
+              f"ходов до победы p50={duels['time_to_kill_p50']} p90={duels['time_to_kill_p90']}")
+
+        skirmishes = simulate(10_000, no_hp_regen, no_hp_regen, team_size=3, executor=pool)
+        print(f"10000 боёв 3 на 3: маг {skirmishes['magician_win_rate']:.3f}, "
+              f"воин {skirmishes['warrior_win_rate']:.3f}")
+
+        sweep = balance_sweep(20_000, {'START_MANA': [80, 100, 120], 'REGEN_HP': [0]},
+                              {'START_STAMINA': [80, 100, 120], 'REGEN_HP': [0]}, pool)
+        for magician_overrides, warrior_overrides, stats in sweep:
+            print(magician_overrides, warrior_overrides, f"маг {stats['magician_win_rate']:.3f}")
@@ -0,0 +1,467 @@
+"""
+Сохранение состояния персонажей из Lab4.py: журнал упреждающей записи (write-ahead log) и инкрементальные контрольные
+точки (checkpoints).
+
+Все изменяющие состояние вызовы (heal, get_damage, get_xp, level_up, restart, cast_the_spell, hit_the_enemy), а также
+появление и удаление персонажей выполняются через PersistentWorld и дописываются в журнал. Записи журнала
+сбрасываются на диск группами (group commit) - одним fsync на пачку записей. Контрольная точка сохраняет только
+персонажей, изменившихся после предыдущей точки, и пишется в фоновом потоке. При восстановлении загружаются
+контрольные точки, после чего из журнала повторяются только записи, сделанные после последней из них. Оборванная
+при сбое последняя запись сегмента отрезается, а новые записи всегда пишутся в новый файл сегмента.
+
+Файлы в каталоге состояния:
+    wal-<lsn>.log - сегменты журнала (одна JSON-запись на строку), lsn - номер первой записи сегмента
+    checkpoint-<lsn>.json - контрольные точки, lsn - номер последней учтённой записи журнала
+"""
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from Lab4 import Character, Magician, Warrior
+
+""" Классы персонажей, которые можно восстановить из контрольной точки, по имени класса """
+CHARACTER_CLASSES = {cls.__name__: cls for cls in (Character, Magician, Warrior)}
+
+""" Методы персонажей, вызовы которых записываются в журнал """
+LOGGED_METHODS = ('heal', 'get_damage', 'get_xp', 'level_up', 'restart', 'cast_the_spell', 'hit_the_enemy')
+
+
+def character_state(character: Character) -> dict:
+    """
+    Возвращает состояние персонажа в виде словаря, пригодного для сохранения в JSON
+
+    :param character: персонаж (Character, Magician или Warrior)
+
+    :return: словарь с классом, идентификатором, никнеймом и характеристиками из SYNC_FIELDS
+    """
+    state = {'class': character.__class__.__name__, 'id_': character.id_, 'name': character.name}
+    for field in character.SYNC_FIELDS:
+        state[field] = getattr(character, field)
+    return state
+
+
+def restore_character(state: dict) -> Character:
+    """
+    Создаёт персонажа по словарю, полученному из character_state
+
+    :param state: сохранённое состояние персонажа
+
+    :raise ValueError: если класс персонажа неизвестен, вызываем ошибку
+
+    :return: восстановленный персонаж
+    """
+    if state['class'] not in CHARACTER_CLASSES:
+        raise ValueError("Неизвестный класс персонажа")
+    character = CHARACTER_CLASSES[state['class']](id_=state['id_'], name=state['name'])
+    for field in character.SYNC_FIELDS:
+        setattr(character, field, state[field])
+    return character
+
+
+def _fsync_directory(directory: str) -> None:
+    """ Сбрасывает на диск запись каталога, чтобы созданные и переименованные файлы пережили сбой """
+    if os.name == 'nt':
+        # в Windows каталог нельзя открыть для fsync, метаданные каталога фиксирует сама файловая система
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_file_durably(path: str, data: str) -> None:
+    """ Атомарно записывает файл: пишем во временный файл, делаем fsync, переименовываем и делаем fsync каталога """
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+    _fsync_directory(directory)
+
+
+class WriteAheadLog:
+    """ Журнал упреждающей записи с групповой фиксацией записей на диске """
+
+    def __init__(self, directory: str, start_lsn: int = 1, group_commit_size: int = 256):
+        """
+        Инициализация журнала. Записи пишутся в новый сегмент, начинающийся с номера start_lsn
+
+        :raise FileExistsError: если сегмент, начинающийся с start_lsn, уже существует, вызываем ошибку (в
+                                существующий сегмент записи не дописываются, см. read(..., repair=True))
+
+        :param directory: каталог, в котором хранятся сегменты журнала
+        :param start_lsn: номер (log sequence number) следующей записи
+        :param group_commit_size: количество записей, после накопления которого они автоматически сбрасываются на диск
+        """
+        self.directory = directory
+        self.group_commit_size = group_commit_size
+        self._next_lsn = start_lsn
+        self._buffer = []
+        self._file = None
+        self.roll()
+
+    @property
+    def last_lsn(self) -> int:
+        """ Возвращает номер последней добавленной записи """
+        return self._next_lsn - 1
+
+    def append(self, record: dict) -> int:
+        """
+        Добавляет запись в журнал. Запись становится устойчивой после ближайшего commit()
+
+        :param record: запись в виде словаря, сериализуемого в JSON
+
+        :return: номер записи (lsn)
+        """
+        lsn = self._next_lsn
+        self._next_lsn += 1
+        self._buffer.append(json.dumps({'lsn': lsn, **record}, ensure_ascii=False))
+        if len(self._buffer) >= self.group_commit_size:
+            self.commit()
+        return lsn
+
+    def commit(self) -> None:
+        """ Сбрасывает накопленные записи на диск одной операцией записи и одним fsync """
+        if not self._buffer:
+            return
+        self._file.write('\n'.join(self._buffer) + '\n')
+        self._buffer = []
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def roll(self) -> None:
+        """
+        Фиксирует текущий сегмент и начинает новый, первой записью которого будет следующая запись журнала.
+        Если в текущий сегмент ничего не записано, он продолжает использоваться
+
+        :raise FileExistsError: если сегмент с таким именем уже существует, вызываем ошибку
+        """
+        path = os.path.join(self.directory, f'wal-{self._next_lsn:012d}.log')
+        if self._file is not None:
+            self.commit()
+            if self._file.name == path:
+                return
+            self._file.close()
+        # режим 'x': новые записи никогда не дописываются после возможного обрыва в существующем файле
+        self._file = open(path, 'x', encoding='utf-8')
+        _fsync_directory(self.directory)
+
+    def close(self) -> None:
+        """ Фиксирует оставшиеся записи и закрывает журнал """
+        self.commit()
+        self._file.close()
+
+    @staticmethod
+    def read(directory: str, after_lsn: int = 0, repair: bool = False) -> list[dict]:
+        """
+        Читает записи всех сегментов журнала с номерами больше after_lsn. Недописанная последняя строка сегмента
+        (обрыв записи при сбое: строка без перевода строки или с некорректным JSON) и всё, что после неё,
+        отбрасывается
+
+        :param directory: каталог с сегментами журнала
+        :param after_lsn: номер записи, после которой нужно начать чтение
+        :param repair: обрезать сегменты до последней целой записи и удалить пустые сегменты (при восстановлении,
+                       до открытия журнала на запись)
+
+        :return: список записей в порядке возрастания lsn
+        """
+        records = []
+        repaired = False
+        for file_name in sorted(name for name in os.listdir(directory) if name.startswith('wal-')):
+            path = os.path.join(directory, file_name)
+            valid_size = 0
+            with open(path, 'rb') as file:
+                for line in file:
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        record = json.loads(line.decode('utf-8'))
+                    except ValueError:
+                        break
+                    valid_size += len(line)
+                    if record['lsn'] > after_lsn:
+                        records.append(record)
+            if not repair:
+                continue
+            if valid_size == 0:
+                os.remove(path)
+                repaired = True
+            elif valid_size < os.path.getsize(path):
+                with open(path, 'r+b') as file:
+                    file.truncate(valid_size)
+                    os.fsync(file.fileno())
+        if repaired:
+            _fsync_directory(directory)
+        return records
+
+
+class PersistentWorld:
+    """ Набор персонажей, все изменения которого записываются в журнал и сохраняются контрольными точками """
+
+    """ После какого количества инкрементальных контрольных точек делается полная (и удаляются старые файлы) """
+    FULL_CHECKPOINT_EVERY = 10
+
+    def __init__(self, directory: str, group_commit_size: int = 256):
+        """
+        Инициализация мира. Если в каталоге уже есть сохранённое состояние, оно восстанавливается
+
+        :param directory: каталог для журнала и контрольных точек (создаётся при необходимости)
+        :param group_commit_size: размер группы записей журнала, см. WriteAheadLog
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.characters = {}
+        self._changed_ids = set()
+        self._removed_ids = set()
+        self._checkpoints_since_full = 0
+        self._last_checkpoint_lsn = None
+        self._lock = threading.Lock()
+        self._checkpointer = None
+        self._stop_checkpointer = threading.Event()
+
+        checkpoint_lsn = self._load_checkpoints()
+        records = WriteAheadLog.read(directory, after_lsn=checkpoint_lsn, repair=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for record in records:
+                self._apply(record)
+        self.wal = WriteAheadLog(directory, start_lsn=records[-1]['lsn'] + 1 if records else checkpoint_lsn + 1,
+                                 group_commit_size=group_commit_size)
+
+    def _checkpoint_files(self) -> list[str]:
+        """ Возвращает имена файлов контрольных точек в порядке возрастания lsn """
+        return sorted(name for name in os.listdir(self.directory)
+                      if name.startswith('checkpoint-') and name.endswith('.json'))
+
+    def _load_checkpoints(self) -> int:
+        """
+        Загружает последнюю полную контрольную точку и все инкрементальные точки после неё
+
+        :return: lsn последней загруженной контрольной точки (0, если точек нет)
+        """
+        checkpoints = []
+        for file_name in self._checkpoint_files():
+            with open(os.path.join(self.directory, file_name), encoding='utf-8') as file:
+                checkpoints.append(json.load(file))
+        full_indexes = [index for index, checkpoint in enumerate(checkpoints) if checkpoint['full']]
+        if not full_indexes:
+            # без полной точки первая же новая точка должна быть полной
+            self._checkpoints_since_full = self.FULL_CHECKPOINT_EVERY
+            return 0
+        self._checkpoints_since_full = len(checkpoints) - 1 - full_indexes[-1]
+        self._last_checkpoint_lsn = checkpoints[-1]['lsn']
+        for checkpoint in checkpoints[full_indexes[-1]:]:
+            for state in checkpoint['characters']:
+                self.characters[state['id_']] = restore_character(state)
+            for id_ in checkpoint['removed']:
+                self.characters.pop(id_, None)
+        return checkpoints[-1]['lsn']
+
+    def _apply(self, record: dict) -> None:
+        """ Применяет запись журнала к миру (используется как при работе, так и при восстановлении) """
+        if record['op'] == 'spawn':
+            self.characters[record['id_']] = CHARACTER_CLASSES[record['class']](id_=record['id_'], name=record['name'])
+            self._removed_ids.discard(record['id_'])
+        elif record['op'] == 'despawn':
+            del self.characters[record['id_']]
+            self._removed_ids.add(record['id_'])
+        else:
+            getattr(self.characters[record['id_']], record['op'])(*record['args'])
+        self._changed_ids.add(record['id_'])
+
+    def spawn(self, character_class: type, id_: int, name: str) -> Character:
+        """
+        Создаёт нового персонажа и записывает это в журнал
+
+        :param character_class: класс персонажа (Character, Magician или Warrior)
+        :param id_: уникальный идентификатор игрока
+        :param name: никнейм игрока
+
+        :raise ValueError: если персонаж с таким id_ уже существует, вызываем ошибку
+
+        :return: созданный персонаж
+        """
+        if id_ in self.characters:
+            raise ValueError("Персонаж с таким идентификатором уже существует")
+        character = character_class(id_=id_, name=name)
+        record = {'op': 'spawn', 'class': character_class.__name__, 'id_': id_, 'name': name}
+        with self._lock:
+            self.characters[id_] = character
+            self._removed_ids.discard(id_)
+            self._changed_ids.add(id_)
+            self.wal.append(record)
+        return character
+
+    def despawn(self, id_: int) -> None:
+        """
+        Удаляет персонажа и записывает это в журнал
+
+        :param id_: идентификатор персонажа
+
+        :raise KeyError: если персонажа с таким id_ нет, вызываем ошибку
+        """
+        with self._lock:
+            del self.characters[id_]
+            self._removed_ids.add(id_)
+            self._changed_ids.add(id_)
+            self.wal.append({'op': 'despawn', 'id_': id_})
+
+    def call(self, id_: int, method: str, *args) -> None:
+        """
+        Вызывает изменяющий состояние метод персонажа и записывает вызов в журнал.
+        В журнал попадают только успешные вызовы, поэтому повтор журнала при восстановлении не вызывает ошибок
+
+        :param id_: идентификатор персонажа
+        :param method: название метода из LOGGED_METHODS
+        :param args: аргументы метода
+
+        :raise ValueError: если метод не входит в LOGGED_METHODS, вызываем ошибку
+        """
+        if method not in LOGGED_METHODS:
+            raise ValueError("Этот метод нельзя вызвать через журнал")
+        character = self.characters[id_]
+        with self._lock:
+            getattr(character, method)(*args)
+            self._changed_ids.add(id_)
+            self.wal.append({'op': method, 'id_': id_, 'args': list(args)})
+
+    def commit(self) -> None:
+        """ Фиксирует на диске все записи журнала, сделанные до этого момента (например, в конце игрового такта) """
+        with self._lock:
+            self.wal.commit()
+
+    def checkpoint(self, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Делает контрольную точку. Под блокировкой копируется только состояние персонажей, изменённых после
+        предыдущей точки, и начинается новый сегмент журнала; запись файла выполняется в фоновом потоке.
+        Каждая FULL_CHECKPOINT_EVERY-я точка полная, после её записи удаляются более старые точки и сегменты журнала
+
+        :param background: записывать ли файл контрольной точки в фоновом потоке
+
+        :return: фоновый поток записи (или None, если background=False или точка не нужна)
+        """
+        with self._lock:
+            # каждое изменение попадает в журнал с новым lsn, поэтому если lsn не сдвинулся с прошлой точки,
+            # состояние на диске уже актуально. Пропуск точки также гарантирует, что у каждой точки своё имя файла
+            # и инкрементальная точка не заменит полную с тем же lsn
+            if self.wal.last_lsn == self._last_checkpoint_lsn:
+                return None
+            full = self._checkpoints_since_full + 1 >= self.FULL_CHECKPOINT_EVERY
+            ids = self.characters.keys() if full else self._changed_ids - self._removed_ids
+            checkpoint = {
+                'lsn': self.wal.last_lsn,
+                'full': full,
+                'characters': [character_state(self.characters[id_]) for id_ in ids],
+                'removed': [] if full else sorted(self._removed_ids),
+            }
+            self._changed_ids = set()
+            self._removed_ids = set()
+            self._checkpoints_since_full = 0 if full else self._checkpoints_since_full + 1
+            self._last_checkpoint_lsn = self.wal.last_lsn
+            self.wal.roll()
+
+        if background:
+            thread = threading.Thread(target=self._write_checkpoint, args=(checkpoint,))
+            thread.start()
+            return thread
+        self._write_checkpoint(checkpoint)
+        return None
+
+    def _write_checkpoint(self, checkpoint: dict) -> None:
+        """ Записывает контрольную точку на диск; после полной точки удаляет ставшие ненужными файлы """
+        path = os.path.join(self.directory, f"checkpoint-{checkpoint['lsn']:012d}.json")
+        _write_file_durably(path, json.dumps(checkpoint, ensure_ascii=False))
+        if checkpoint['full']:
+            for file_name in self._checkpoint_files():
+                if int(file_name[len('checkpoint-'):-len('.json')]) < checkpoint['lsn']:
+                    os.remove(os.path.join(self.directory, file_name))
+            for file_name in sorted(os.listdir(self.directory)):
+                if file_name.startswith('wal-') and int(file_name[len('wal-'):-len('.log')]) <= checkpoint['lsn']:
+                    os.remove(os.path.join(self.directory, file_name))
+
+    def start_checkpointer(self, interval: float) -> None:
+        """
+        Запускает фоновый поток, который фиксирует журнал и делает контрольную точку каждые interval секунд
+
+        :param interval: период контрольных точек в секундах
+        """
+        def run() -> None:
+            while not self._stop_checkpointer.wait(interval):
+                self.commit()
+                self.checkpoint(background=False)
+
+        self._checkpointer = threading.Thread(target=run, daemon=True)
+        self._checkpointer.start()
+
+    def close(self) -> None:
+        """ Останавливает фоновые контрольные точки, фиксирует журнал и закрывает его """
+        if self._checkpointer is not None:
+            self._stop_checkpointer.set()
+            self._checkpointer.join()
+        with self._lock:
+            self.wal.close()
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as state_directory:
+        world = PersistentWorld(state_directory)
+        world.spawn(Magician, id_=53642, name="MasterMerlin")
+        world.spawn(Warrior, id_=53643, name="TrollSlayer")
+        world.call(53642, 'cast_the_spell', 'Attack Spell')
+        world.call(53643, 'get_xp', 1250)
+        world.checkpoint().join()
+        world.call(53643, 'hit_the_enemy', 'Heavy Hit')
+        world.commit()
+        # имитируем сбой: журнал не закрыт, мир восстанавливается из каталога
+        recovered = PersistentWorld(state_directory)
+        for character in recovered.characters.values():
+            print(character, character_state(character))
+
+    # проверка обрыва записи: последняя запись сегмента повреждена при сбое, после восстановления журнал продолжается
+    with tempfile.TemporaryDirectory() as state_directory:
+        world = PersistentWorld(state_directory)
+        world.spawn(Warrior, id_=1, name="TornWrite")
+        world.checkpoint(background=False)
+        world.call(1, 'get_xp', 7)
+        world.commit()
+        segment_path = os.path.join(state_directory, f'wal-{world.wal.last_lsn:012d}.log')
+        with open(segment_path, 'r+b') as segment:
+            segment.truncate(os.path.getsize(segment_path) // 2)
+        world = PersistentWorld(state_directory)
+        world.call(1, 'get_xp', 500)
+        world.call(1, 'get_xp', 1)
+        world.commit()
+        recovered_xp = PersistentWorld(state_directory).characters[1].xp
+        if recovered_xp != 501:
+            raise RuntimeError(f"После обрыва записи восстановлен опыт {recovered_xp}, ожидался 501")
+        print(f"Обрыв записи: восстановлен опыт {recovered_xp}")
+
+    # бенчмарк: 100 000 персонажей, 1 000 000 записанных вызовов, восстановление из журнала
+    with tempfile.TemporaryDirectory() as state_directory:
+        world = PersistentWorld(state_directory, group_commit_size=4096)
+        for id_ in range(1, 100_001):
+            world.spawn(Warrior, id_=id_, name=f"Player{id_}")
+        world.checkpoint(background=False)
+        start = time.perf_counter()
+        for call_number in range(1_000_000):
+            world.call(call_number % 100_000 + 1, 'get_xp', 7)
+        world.commit()
+        logged = time.perf_counter()
+        world.checkpoint().join()
+        checkpointed = time.perf_counter()
+        for call_number in range(200_000):
+            world.call(call_number % 100_000 + 1, 'heal', 1)
+        world.commit()
+        recovery_start = time.perf_counter()
+        recovered = PersistentWorld(state_directory)
+        finished = time.perf_counter()
+        print(f"Запись 1000000 вызовов в журнал: {logged - start:.2f} с, "
+              f"контрольная точка: {checkpointed - logged:.2f} с, "
+              f"восстановление (точки + 200000 записей журнала): {finished - recovery_start:.2f} с")
@@ -0,0 +1,172 @@
+"""
+Пулы объектов персонажей из Lab4.py.
+
+Когда игрок выходит из игры, объект его персонажа возвращается в пул своей роли, а при входе нового игрока
+берётся из пула и сбрасывается методом Character.reuse() вместо создания нового объекта. Это уменьшает количество
+создаваемых и удаляемых объектов и, как следствие, работу сборщика мусора. Размер пула ограничен: лишние объекты
+при возврате отбрасываются.
+"""
+import gc
+import time
+
+from Lab4 import Character, Magician, Warrior
+
+
+class CharacterPool:
+    """ Пул объектов персонажей одной роли """
+
+    def __init__(self, role: type, max_size: int = 1024):
+        """
+        Инициализация пустого пула
+
+        :param role: класс роли (Character, Magician или Warrior)
+        :param max_size: максимальное количество свободных объектов в пуле
+
+        :raise TypeError: если role не является подклассом Character, вызываем ошибку
+        :raise ValueError: если max_size отрицательный, вызываем ошибку
+        """
+        if not isinstance(role, type) or not issubclass(role, Character):
+            raise TypeError("Роль должна быть классом персонажа (подклассом Character)")
+        if max_size < 0:
+            raise ValueError("Размер пула не может быть отрицательным")
+        self.role = role
+        self.max_size = max_size
+        self._free = []
+        # id свободных объектов: защита от повторного возврата одного и того же объекта
+        self._free_ids = set()
+        self.created = 0
+        self.reused = 0
+        self.released = 0
+        self.discarded = 0
+
+    def __len__(self) -> int:
+        """ Количество свободных объектов в пуле """
+        return len(self._free)
+
+    def acquire(self, id_: int, name: str) -> Character:
+        """
+        Выдаёт персонажа для нового игрока: свободный объект из пула или, если пул пуст, новый
+
+        :param id_: уникальный идентификатор игрока
+        :param name: никнейм игрока
+
+        :return: персонаж роли пула с начальными характеристиками
+        """
+        if self._free:
+            character = self._free.pop()
+            self._free_ids.discard(id(character))
+            character.reuse(id_, name)
+            self.reused += 1
+            return character
+        self.created += 1
+        return self.role(id_=id_, name=name)
+
+    def release(self, character: Character) -> None:
+        """
+        Возвращает персонажа в пул. Если пул заполнен, объект отбрасывается. После возврата объект нельзя
+        использовать: он будет выдан другому игроку
+
+        :param character: персонаж, полученный из этого пула
+
+        :raise TypeError: если персонаж другой роли, вызываем ошибку
+        :raise ValueError: если персонаж уже возвращён в пул, вызываем ошибку (иначе один объект выдали бы двум игрокам)
+        """
+        if type(character) is not self.role:
+            raise TypeError("Персонаж другой роли не может быть возвращён в этот пул")
+        if id(character) in self._free_ids:
+            raise ValueError("Персонаж уже возвращён в пул")
+        self.released += 1
+        if len(self._free) < self.max_size:
+            self._free.append(character)
+            self._free_ids.add(id(character))
+        else:
+            self.discarded += 1
+
+    def stats(self) -> dict[str, int]:
+        """ Возвращает статистику использования пула """
+        return {
+            'free': len(self._free),
+            'max_size': self.max_size,
+            'created': self.created,
+            'reused': self.reused,
+            'released': self.released,
+            'discarded': self.discarded,
+        }
+
+
+class RolePools:
+    """ Набор пулов для всех ролей: персонажи выдаются и возвращаются по классу роли """
+
+    def __init__(self, max_size: int = 1024, roles: tuple = (Character, Magician, Warrior)):
+        """
+        Инициализация пулов
+
+        :param max_size: максимальный размер пула каждой роли
+        :param roles: классы ролей
+        """
+        self.pools = {role: CharacterPool(role, max_size) for role in roles}
+
+    def acquire(self, role: type, id_: int, name: str) -> Character:
+        """ Выдаёт персонажа роли role (см. CharacterPool.acquire) """
+        return self.pools[role].acquire(id_, name)
+
+    def release(self, character: Character) -> None:
+        """ Возвращает персонажа в пул его роли (см. CharacterPool.release) """
+        self.pools[type(character)].release(character)
+
+
+def benchmark(use_pool: bool, cycles: int = 100, online: int = 5000) -> tuple[float, float]:
+    """
+    Замер: cycles раз заходят online игроков, получают урон и выходят
+
+    :param use_pool: брать персонажей из пула или создавать новых
+    :param cycles: количество циклов входа и выхода
+    :param online: количество игроков в одном цикле
+
+    :return: время работы и суммарное время пауз сборщика мусора в секундах
+    """
+    pauses = []
+    started = []
+
+    def on_gc(phase: str, info: dict) -> None:
+        if phase == 'start':
+            started.append(time.perf_counter())
+        elif started:
+            pauses.append(time.perf_counter() - started.pop())
+
+    pools = RolePools(max_size=online)
+    gc.collect()
+    gc.callbacks.append(on_gc)
+    start = time.perf_counter()
+    id_ = 0
+    for _ in range(cycles):
+        players = []
+        for _ in range(online):
+            id_ += 1
+            if use_pool:
+                character = pools.acquire(Warrior, id_, "Player")
+            else:
+                character = Warrior(id_=id_, name="Player")
+            character.get_damage(10)
+            players.append(character)
+        if use_pool:
+            for character in players:
+                pools.release(character)
+    elapsed = time.perf_counter() - start
+    gc.callbacks.remove(on_gc)
+    return elapsed, sum(pauses)
+
+
+if __name__ == "__main__":
+    pools = RolePools(max_size=2)
+    magician = pools.acquire(Magician, 53642, "MasterMerlin")
+    magician.cast_the_spell('Attack Spell')
+    pools.release(magician)
+    magician = pools.acquire(Magician, 53644, "NewMerlin")
+    print(repr(magician), magician.get_current_characteristics())
+    print(pools.pools[Magician].stats())
+
+    for use_pool in (False, True):
+        elapsed, gc_pauses = benchmark(use_pool)
+        print(f"{'Пул' if use_pool else 'Создание объектов'}: {elapsed:.2f} с, паузы сборщика мусора: "
+              f"{gc_pauses * 1000:.1f} мс")
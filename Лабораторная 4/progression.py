@@ -0,0 +1,131 @@
+"""
+Табличные кривые прогрессии персонажей из Lab4.py.
+
+Таблица задаёт для каждого уровня количество опыта, нужное для перехода на следующий уровень, и прирост характеристик
+(здоровья, маны, выносливости) при этом переходе. Накопленные суммы опыта и прироста считаются один раз при создании
+таблицы, поэтому новый уровень находится двоичным поиском за O(log L), а прирост характеристик за любое количество
+уровней - разностью двух накопленных сумм. За пределами таблицы повторяются значения её последнего уровня.
+
+Чтобы персонаж использовал таблицу, её нужно присвоить атрибуту класса PROGRESSION:
+    class VeteranWarrior(Warrior):
+        PROGRESSION = ProgressionTable.from_formula(100, lambda level: 1000 * level, hp=lambda level: 10 + level)
+"""
+import time
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Callable, Optional
+
+
+class ProgressionTable:
+    """ Таблица прогрессии: требования опыта по уровням и прирост характеристик """
+
+    def __init__(self, xp_to_next_level: list[int], stat_gains: Optional[dict[str, list[int]]] = None):
+        """
+        Инициализация таблицы и предварительный расчёт накопленных сумм
+
+        :param xp_to_next_level: xp_to_next_level[i] - опыт, нужный для перехода с уровня i + 1 на уровень i + 2
+        :param stat_gains: {характеристика: список приростов}, где список[i] - прирост при переходе с уровня i + 1
+                           на уровень i + 2. Характеристики называются 'hp', 'mana', 'stamina'
+
+        :raise TypeError: если требования или приросты не являются списками целых чисел, вызываем ошибку
+        :raise ValueError: если список требований пуст, требования не положительные, приросты отрицательные или
+                           длина списка приростов не совпадает с длиной списка требований, вызываем ошибку
+        """
+        if not isinstance(xp_to_next_level, list) or not all(isinstance(xp, int) for xp in xp_to_next_level):
+            raise TypeError("Требования опыта должны быть списком целых чисел (list[int])")
+        if not xp_to_next_level or not all(xp > 0 for xp in xp_to_next_level):
+            raise ValueError("Требования опыта должны быть непустым списком положительных чисел")
+        stat_gains = stat_gains or {}
+        for gains in stat_gains.values():
+            if not isinstance(gains, list) or not all(isinstance(gain, int) for gain in gains):
+                raise TypeError("Приросты характеристик должны быть списками целых чисел (list[int])")
+            if len(gains) != len(xp_to_next_level) or not all(gain >= 0 for gain in gains):
+                raise ValueError("Приросты должны быть неотрицательными и заданы для каждого уровня таблицы")
+
+        self._levels_count = len(xp_to_next_level)
+        self._last_xp = xp_to_next_level[-1]
+        self._cumulative_xp = list(accumulate(xp_to_next_level, initial=0))
+        self._last_gains = {stat: gains[-1] for stat, gains in stat_gains.items()}
+        self._cumulative_gains = {stat: list(accumulate(gains, initial=0)) for stat, gains in stat_gains.items()}
+
+    @classmethod
+    def from_formula(cls, levels: int, xp_formula: Callable[[int], int],
+                     **gain_formulas: Callable[[int], int]) -> 'ProgressionTable':
+        """
+        Строит таблицу по формулам
+
+        :param levels: количество уровней в таблице
+        :param xp_formula: функция уровня, возвращающая опыт для перехода на следующий уровень
+        :param gain_formulas: функции уровня для приростов характеристик, например hp=lambda level: 10
+
+        :return: таблица прогрессии
+        """
+        return cls([int(xp_formula(level)) for level in range(1, levels + 1)],
+                   {stat: [int(formula(level)) for level in range(1, levels + 1)]
+                    for stat, formula in gain_formulas.items()})
+
+    def total_xp_for_level(self, level: int) -> int:
+        """
+        Возвращает суммарный опыт, нужный, чтобы дойти с первого уровня до уровня level
+
+        :param level: уровень (начиная с 1)
+        """
+        if level - 1 <= self._levels_count:
+            return self._cumulative_xp[level - 1]
+        return self._cumulative_xp[-1] + (level - 1 - self._levels_count) * self._last_xp
+
+    def resolve(self, level: int, xp: int) -> tuple[int, int]:
+        """
+        Находит уровень, которого достигает персонаж уровня level с xp опыта, накопленного на этом уровне
+
+        :param level: текущий уровень
+        :param xp: опыт, накопленный на текущем уровне (может превышать требование уровня)
+
+        :return: новый уровень и опыт, накопленный на новом уровне
+        """
+        total = self.total_xp_for_level(level) + xp
+        if total < self._cumulative_xp[-1]:
+            new_level = bisect_right(self._cumulative_xp, total)
+            return new_level, total - self._cumulative_xp[new_level - 1]
+        extra_levels, rest = divmod(total - self._cumulative_xp[-1], self._last_xp)
+        return self._levels_count + 1 + extra_levels, rest
+
+    def _total_gain(self, stat: str, level: int) -> int:
+        """ Суммарный прирост характеристики stat при переходе с первого уровня на уровень level """
+        cumulative = self._cumulative_gains[stat]
+        if level - 1 <= self._levels_count:
+            return cumulative[level - 1]
+        return cumulative[-1] + (level - 1 - self._levels_count) * self._last_gains[stat]
+
+    def stat_gain(self, stat: str, from_level: int, to_level: int) -> int:
+        """
+        Возвращает суммарный прирост характеристики при переходе с уровня from_level на уровень to_level
+
+        :param stat: характеристика ('hp', 'mana', 'stamina'). Если её нет в таблице, прирост равен 0
+        :param from_level: исходный уровень
+        :param to_level: новый уровень
+        """
+        if stat not in self._cumulative_gains:
+            return 0
+        return self._total_gain(stat, to_level) - self._total_gain(stat, from_level)
+
+
+if __name__ == "__main__":
+    from Lab4 import Warrior
+
+    class VeteranWarrior(Warrior):
+        """ Воин с нелинейной прогрессией: требование опыта растёт квадратично """
+        PROGRESSION = ProgressionTable.from_formula(
+            1000, lambda level: 500 * level * level, hp=lambda level: 10 + level // 10, stamina=lambda level: 5
+        )
+
+    warrior = VeteranWarrior(id_=53643, name="TrollSlayer")
+    warrior.get_xp(1250)
+    print(warrior.get_current_characteristics())
+    warrior.get_xp(10 ** 9)
+    print(warrior.get_current_characteristics())
+
+    start = time.perf_counter()
+    for _ in range(100_000):
+        VeteranWarrior.PROGRESSION.resolve(1, 10 ** 15)
+    print(f"Поиск уровня: {(time.perf_counter() - start) / 100_000 * 1e9:.0f} нс")
@@ -0,0 +1,270 @@
+"""
+Планировщик регенерации и перезарядки способностей персонажей из Lab4.py.
+
+Вместо того чтобы на каждом такте опрашивать всех персонажей, регенерация и окончание перезарядки планируются
+как таймеры в иерархическом колесе времени (timing wheel). Постановка, отмена и срабатывание таймера выполняются
+за O(1), а стоимость такта зависит только от количества сработавших таймеров, а не от числа персонажей.
+"""
+import random
+import time
+from typing import Callable, Optional
+
+from Lab4 import Character, Magician, Warrior
+
+
+class Timer:
+    """ Таймер, поставленный в колесо времени. Отмена таймера ленивая - он просто помечается как отменённый """
+    __slots__ = ('deadline', 'callback', 'cancelled')
+
+    def __init__(self, deadline: int, callback: Callable[[], None]):
+        """
+        Инициализация таймера
+
+        :param deadline: номер такта, на котором таймер должен сработать
+        :param callback: функция без аргументов, вызываемая при срабатывании таймера
+        """
+        self.deadline = deadline
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """ Отменяет таймер: при срабатывании callback вызван не будет """
+        self.cancelled = True
+
+
+class TimingWheel:
+    """
+    Иерархическое колесо времени. Уровень 0 хранит таймеры ближайших SLOTS тактов с точностью до такта,
+    каждый следующий уровень покрывает в SLOTS раз больший диапазон. Когда младший уровень делает полный оборот,
+    таймеры из очередной ячейки старшего уровня переносятся (cascade) на младшие уровни
+    """
+
+    """ Количество бит индекса ячейки на одном уровне и соответствующее количество ячеек """
+    SLOT_BITS = 6
+    SLOTS = 1 << SLOT_BITS
+
+    """ Количество уровней колеса: колесо без переполнения покрывает SLOTS ** LEVELS тактов """
+    LEVELS = 4
+
+    def __init__(self):
+        """ Инициализация пустого колеса времени, текущий такт равен 0 """
+        self._slot_mask = self.SLOTS - 1
+        self._span = 1 << (self.SLOT_BITS * self.LEVELS)
+        self._wheels = [[[] for _ in range(self.SLOTS)] for _ in range(self.LEVELS)]
+        self._current_tick = 0
+        self._pending = 0
+
+    def __len__(self) -> int:
+        """ Количество таймеров в колесе (включая отменённые, ещё не удалённые из ячеек) """
+        return self._pending
+
+    @property
+    def current_tick(self) -> int:
+        """ Возвращает номер текущего такта """
+        return self._current_tick
+
+    def schedule(self, delay: int, callback: Callable[[], None]) -> Timer:
+        """
+        Ставит таймер, который сработает через delay тактов
+
+        :param delay: через сколько тактов должен сработать таймер (целое положительное число)
+        :param callback: функция без аргументов, вызываемая при срабатывании
+
+        :raise TypeError: если delay не является типом int, вызываем ошибку
+        :raise ValueError: если delay меньше или равен 0, вызываем ошибку
+
+        :return: объект Timer, через который таймер можно отменить
+        """
+        if not isinstance(delay, int):
+            raise TypeError("Задержка таймера должна быть типа int")
+        if delay <= 0:
+            raise ValueError("Задержка таймера должна быть положительной")
+        timer = Timer(self._current_tick + delay, callback)
+        self._insert(timer)
+        self._pending += 1
+        return timer
+
+    def _insert(self, timer: Timer) -> None:
+        """
+        Кладёт таймер в ячейку нужного уровня в зависимости от оставшегося до срабатывания времени.
+        Таймеры дальше диапазона колеса кладутся в последнюю ячейку старшего уровня и переносятся повторно при cascade
+        """
+        delta = timer.deadline - self._current_tick
+        expires = timer.deadline if delta < self._span else self._current_tick + self._span - 1
+        level = 0
+        while level < self.LEVELS - 1 and delta >= 1 << (self.SLOT_BITS * (level + 1)):
+            level += 1
+        index = (expires >> (self.SLOT_BITS * level)) & self._slot_mask
+        self._wheels[level][index].append(timer)
+
+    def _cascade(self, level: int) -> int:
+        """
+        Переносит таймеры из текущей ячейки уровня level на младшие уровни
+
+        :return: индекс перенесённой ячейки (0 означает, что нужно перенести ячейку и следующего уровня)
+        """
+        index = (self._current_tick >> (self.SLOT_BITS * level)) & self._slot_mask
+        bucket = self._wheels[level][index]
+        self._wheels[level][index] = []
+        for timer in bucket:
+            if timer.cancelled:
+                self._pending -= 1
+            else:
+                self._insert(timer)
+        return index
+
+    def tick(self) -> int:
+        """
+        Продвигает колесо на один такт и вызывает callback у всех таймеров, срок которых наступил
+
+        :return: количество сработавших таймеров
+        """
+        self._current_tick += 1
+        if self._current_tick & self._slot_mask == 0:
+            level = 1
+            while level < self.LEVELS and self._cascade(level) == 0:
+                level += 1
+
+        index = self._current_tick & self._slot_mask
+        bucket = self._wheels[0][index]
+        self._wheels[0][index] = []
+        self._pending -= len(bucket)
+        fired = 0
+        for timer in bucket:
+            if not timer.cancelled:
+                timer.callback()
+                fired += 1
+        return fired
+
+    def advance(self, ticks: int) -> int:
+        """
+        Продвигает колесо на ticks тактов
+
+        :param ticks: количество тактов
+
+        :return: суммарное количество сработавших таймеров
+        """
+        return sum(self.tick() for _ in range(ticks))
+
+
+class RegenerationScheduler:
+    """
+    Планировщик регенерации здоровья, маны и выносливости и перезарядки способностей персонажей.
+    Для каждого зарегистрированного персонажа в колесе времени стоит ровно один периодический таймер регенерации,
+    который на каждом срабатывании вызывает Character.regenerate() и ставит себя заново
+    """
+
+    """ Период регенерации по умолчанию (в тактах) """
+    REGEN_PERIOD = 10
+
+    def __init__(self, wheel: Optional[TimingWheel] = None):
+        """
+        Инициализация планировщика
+
+        :param wheel: колесо времени, в которое ставятся таймеры. Если не передано, создаётся новое
+        """
+        # пустое колесо ложно в логическом контексте (TimingWheel.__len__), поэтому сравниваем с None
+        self.wheel = wheel if wheel is not None else TimingWheel()
+        self._regen_timers = {}
+        # id_ персонажа -> {название способности: таймер окончания перезарядки}
+        self._cooldowns = {}
+
+    def register(self, character: Character, period: int = REGEN_PERIOD) -> None:
+        """
+        Включает периодическую регенерацию персонажа. Повторная регистрация заменяет прежний таймер
+
+        :param character: персонаж (Character, Magician или Warrior)
+        :param period: период регенерации в тактах
+        """
+        self.unregister(character)
+
+        def regen_tick() -> None:
+            character.regenerate()
+            self._regen_timers[character.id_] = self.wheel.schedule(period, regen_tick)
+
+        self._regen_timers[character.id_] = self.wheel.schedule(period, regen_tick)
+
+    def unregister(self, character: Character) -> None:
+        """
+        Отключает регенерацию и сбрасывает перезарядки персонажа (например, при выходе игрока из игры)
+
+        :param character: персонаж, для которого нужно отменить таймеры
+        """
+        timer = self._regen_timers.pop(character.id_, None)
+        if timer is not None:
+            timer.cancel()
+        for cooldown in self._cooldowns.pop(character.id_, {}).values():
+            cooldown.cancel()
+
+    def start_cooldown(self, character: Character, ability: str, ticks: int) -> None:
+        """
+        Запускает перезарядку способности ability персонажа на ticks тактов
+
+        :param character: персонаж, использовавший способность
+        :param ability: название способности (ключ Magician.SPELLS или Warrior.HITS)
+        :param ticks: длительность перезарядки в тактах
+
+        :raise ValueError: если способность уже перезаряжается, вызываем ошибку
+        """
+        id_ = character.id_
+        cooldowns = self._cooldowns.setdefault(id_, {})
+        if ability in cooldowns:
+            raise ValueError("Способность ещё перезаряжается")
+
+        def finish_cooldown() -> None:
+            cooldowns.pop(ability, None)
+            if not cooldowns and self._cooldowns.get(id_) is cooldowns:
+                del self._cooldowns[id_]
+
+        cooldowns[ability] = self.wheel.schedule(ticks, finish_cooldown)
+
+    def is_on_cooldown(self, character: Character, ability: str) -> bool:
+        """
+        Проверяет, перезаряжается ли способность ability персонажа
+
+        :return: True, если способность ещё нельзя использовать
+        """
+        return ability in self._cooldowns.get(character.id_, ())
+
+    def tick(self) -> int:
+        """
+        Один игровой такт: срабатывают таймеры регенерации и окончания перезарядки, срок которых наступил
+
+        :return: количество сработавших таймеров
+        """
+        return self.wheel.tick()
+
+
+if __name__ == "__main__":
+    scheduler = RegenerationScheduler()
+    magician = Magician(id_=53642, name="MasterMerlin")
+    warrior = Warrior(id_=53643, name="TrollSlayer")
+    scheduler.register(magician, period=2)
+    scheduler.register(warrior, period=3)
+
+    magician.get_damage(30)
+    magician.cast_the_spell('Teleport Spell')
+    scheduler.start_cooldown(magician, 'Teleport Spell', ticks=5)
+    warrior.hit_the_enemy('Ultimate Hit')
+    print(magician.get_current_characteristics())
+    print(warrior.get_current_characteristics())
+
+    scheduler.wheel.advance(6)
+    print(magician.get_current_characteristics())
+    print(warrior.get_current_characteristics())
+    print(scheduler.is_on_cooldown(magician, 'Teleport Spell'))
+
+    # бенчмарк: 1 000 000 ожидающих таймеров со случайными задержками
+    random.seed(0)
+    timers_count = 1_000_000
+    wheel = TimingWheel()
+    start = time.perf_counter()
+    for _ in range(timers_count):
+        wheel.schedule(random.randint(1, 100_000), lambda: None)
+    scheduled = time.perf_counter()
+    fired = wheel.advance(100_000)
+    finished = time.perf_counter()
+    print(f"Постановка {timers_count} таймеров: {scheduled - start:.2f} с "
+          f"({(scheduled - start) / timers_count * 1e9:.0f} нс на таймер)")
+    print(f"Срабатывание {fired} таймеров за 100000 тактов: {finished - scheduled:.2f} с "
+          f"({(finished - scheduled) / fired * 1e9:.0f} нс на таймер)")
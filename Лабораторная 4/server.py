@@ -0,0 +1,347 @@
+"""
+Асинхронный сервер игровых команд для персонажей из Lab4.py.
+
+Клиенты подключаются по TCP или через Unix-сокет и отправляют команды строками JSON:
+    {"request_id": 1, "command": "cast_spell", "character": 53642, "args": ["Attack Spell"]}
+и получают ответы тоже строками JSON:
+    {"request_id": 1, "ok": true, "state": {...}} или {"request_id": 1, "ok": false, "error": "..."}
+
+Каждый персонаж - актор с собственной очередью команд. Команды не выполняются сразу: они копятся в очередях и
+выполняются пачкой на ближайшем игровом такте, по очереди для каждого персонажа, у которого есть команды.
+Все команды выполняются в одном потоке цикла событий, поэтому блокировки не нужны, а команды одного персонажа
+выполняются строго в порядке поступления.
+"""
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from typing import Optional
+
+from Lab4 import Character, Warrior
+from persistence import CHARACTER_CLASSES, character_state
+
+""" Команды протокола и соответствующие им методы персонажа """
+COMMANDS = {
+    'cast_spell': 'cast_the_spell',
+    'hit': 'hit_the_enemy',
+    'heal': 'heal',
+    'damage': 'get_damage',
+    'xp': 'get_xp',
+}
+
+
+class GameServer:
+    """ Сервер игровых команд с очередью команд на каждого персонажа и пакетным выполнением по тактам """
+
+    """ Длительность игрового такта в секундах """
+    TICK_INTERVAL = 0.005
+
+    def __init__(self, tick_interval: float = TICK_INTERVAL):
+        """
+        Инициализация сервера без персонажей
+
+        :param tick_interval: длительность игрового такта в секундах
+        """
+        self.tick_interval = tick_interval
+        self.characters = {}
+        self._mailboxes = {}
+        self._ready_ids = []
+        self._server = None
+        self._tick_task = None
+        self._stopped = False
+        self.ticks = 0
+
+    def spawn(self, character: Character) -> None:
+        """
+        Добавляет персонажа на сервер
+
+        :param character: персонаж (Character, Magician или Warrior)
+
+        :raise ValueError: если персонаж с таким id_ уже есть на сервере, вызываем ошибку
+        """
+        if character.id_ in self.characters:
+            raise ValueError("Персонаж с таким идентификатором уже существует")
+        self.characters[character.id_] = character
+        self._mailboxes[character.id_] = deque()
+
+    def submit(self, command: str, character_id: int, args: list) -> asyncio.Future:
+        """
+        Ставит команду в очередь персонажа. Команда будет выполнена на ближайшем такте
+
+        :param command: название команды (ключ словаря COMMANDS или 'spawn')
+        :param character_id: идентификатор персонажа
+        :param args: аргументы команды
+
+        :return: future, в которое будет записан результат выполнения команды
+        """
+        future = asyncio.get_running_loop().create_future()
+        if self._stopped:
+            future.set_result({'ok': False, 'error': "Сервер остановлен"})
+            return future
+        if command == 'spawn':
+            future.set_result(self._spawn_command(character_id, args))
+            return future
+        mailbox = self._mailboxes.get(character_id)
+        if mailbox is None:
+            future.set_result({'ok': False, 'error': "Персонажа с таким идентификатором нет"})
+            return future
+        if not mailbox:
+            self._ready_ids.append(character_id)
+        mailbox.append((command, args, future))
+        return future
+
+    def _spawn_command(self, character_id: int, args: list) -> dict:
+        """ Выполняет команду spawn: args - [имя класса персонажа, никнейм] """
+        try:
+            class_name, name = args
+            self.spawn(CHARACTER_CLASSES[class_name](id_=character_id, name=name))
+        except (KeyError, TypeError, ValueError) as error:
+            return {'ok': False, 'error': str(error)}
+        return {'ok': True, 'state': character_state(self.characters[character_id])}
+
+    def run_tick(self) -> int:
+        """
+        Выполняет все накопленные команды: для каждого персонажа с непустой очередью команды выполняются по порядку
+
+        :return: количество выполненных команд
+        """
+        ready_ids, self._ready_ids = self._ready_ids, []
+        executed = 0
+        for character_id in ready_ids:
+            character = self.characters[character_id]
+            mailbox = self._mailboxes[character_id]
+            while mailbox:
+                command, args, future = mailbox.popleft()
+                executed += 1
+                if future.cancelled():
+                    continue
+                if command not in COMMANDS:
+                    future.set_result({'ok': False, 'error': "Неизвестная команда"})
+                    continue
+                method = getattr(character, COMMANDS[command], None)
+                if method is None:
+                    # например, cast_spell для Warrior или hit для Magician
+                    future.set_result({'ok': False, 'error': "Команда недоступна для роли персонажа"})
+                    continue
+                # ошибка одной команды не должна останавливать такт и цикл тактов
+                try:
+                    method(*args)
+                    response = {'ok': True, 'state': character_state(character)}
+                except Exception as error:
+                    response = {'ok': False, 'error': str(error)}
+                future.set_result(response)
+        self.ticks += 1
+        return executed
+
+    async def _tick_loop(self) -> None:
+        """ Цикл игровых тактов """
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            self.run_tick()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """ Обрабатывает соединение клиента: читает команды построчно и отвечает по мере их выполнения """
+        pending = set()
+
+        async def respond(request_id, future: asyncio.Future) -> None:
+            response = await future
+            writer.write(json.dumps({'request_id': request_id, **response}, ensure_ascii=False).encode() + b'\n')
+
+        try:
+            while line := await reader.readline():
+                request_id = None
+                try:
+                    request = json.loads(line)
+                    request_id = request.get('request_id')
+                    future = self.submit(request['command'], request['character'], request.get('args', []))
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    # request_id возвращается, если его удалось прочитать, чтобы клиент сопоставил ответ с запросом
+                    writer.write(json.dumps({'request_id': request_id, 'ok': False,
+                                             'error': "bad request"}).encode() + b'\n')
+                    continue
+                task = asyncio.create_task(respond(request.get('request_id'), future))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+                if writer.transport.get_write_buffer_size() > 1 << 16:
+                    await writer.drain()
+            if pending:
+                await asyncio.wait(pending)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0, unix_path: Optional[str] = None) -> None:
+        """
+        Запускает сервер и цикл игровых тактов
+
+        :param host: адрес для TCP-сервера
+        :param port: порт для TCP-сервера (0 - выбрать свободный порт)
+        :param unix_path: путь к Unix-сокету. Если передан, сервер слушает Unix-сокет вместо TCP
+        """
+        if unix_path is not None:
+            self._server = await asyncio.start_unix_server(self._handle_client, path=unix_path)
+        else:
+            self._server = await asyncio.start_server(self._handle_client, host=host, port=port)
+        self._tick_task = asyncio.create_task(self._tick_loop())
+
+    @property
+    def port(self) -> int:
+        """ Возвращает порт, который слушает TCP-сервер """
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """
+        Останавливает приём соединений и цикл тактов. Команды, которые уже стоят в очередях, не выполняются: на них
+        отвечается ошибкой, чтобы клиенты не ждали ответа, который никогда не придёт
+        """
+        self._stopped = True
+        self._tick_task.cancel()
+        self._server.close()
+        for mailbox in self._mailboxes.values():
+            while mailbox:
+                _, _, future = mailbox.popleft()
+                if not future.done():
+                    future.set_result({'ok': False, 'error': "Сервер остановлен"})
+        self._ready_ids.clear()
+        await self._server.wait_closed()
+
+
+class GameClient:
+    """ Клиент сервера игровых команд: позволяет отправлять несколько команд, не дожидаясь ответов """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """ Инициализация клиента по открытому соединению (см. connect) """
+        self._reader = reader
+        self._writer = writer
+        self._next_request_id = 0
+        self._waiting = {}
+        self._reader_task = asyncio.create_task(self._read_responses())
+
+    @classmethod
+    async def connect(cls, host: str = '127.0.0.1', port: int = 0, unix_path: Optional[str] = None) -> 'GameClient':
+        """ Подключается к серверу по TCP или через Unix-сокет и возвращает клиента """
+        if unix_path is not None:
+            reader, writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _read_responses(self) -> None:
+        """
+        Читает ответы сервера и передаёт их ожидающим командам. Когда соединение закрывается, команды, оставшиеся
+        без ответа, завершаются ошибкой ConnectionError
+        """
+        try:
+            while line := await self._reader.readline():
+                response = json.loads(line)
+                # ответ без известного request_id (например, на нечитаемую строку) некому передать
+                future = self._waiting.pop(response.pop('request_id', None), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            waiting, self._waiting = self._waiting, {}
+            for future in waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Соединение с сервером закрыто"))
+
+    async def send(self, command: str, character_id: int, *args) -> dict:
+        """
+        Отправляет команду и ждёт ответа
+
+        :param command: название команды
+        :param character_id: идентификатор персонажа
+        :param args: аргументы команды
+
+        :return: ответ сервера
+
+        :raise ConnectionError: если соединение закрыто до получения ответа, вызываем ошибку
+        """
+        if self._reader_task.done():
+            raise ConnectionError("Соединение с сервером закрыто")
+        self._next_request_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[self._next_request_id] = future
+        request = {'request_id': self._next_request_id, 'command': command, 'character': character_id,
+                   'args': list(args)}
+        self._writer.write(json.dumps(request, ensure_ascii=False).encode() + b'\n')
+        return await future
+
+    async def close(self) -> None:
+        """ Закрывает соединение """
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._reader_task.cancel()
+
+
+async def run_load(port: int, characters: list[int], clients: int = 8, commands_per_client: int = 5000,
+                   in_flight: int = 64, seed: int = 0) -> dict:
+    """
+    Генератор нагрузки: clients клиентов отправляют случайные команды heal/xp/damage, держа до in_flight
+    неотвеченных команд на клиента
+
+    :param port: порт сервера
+    :param characters: идентификаторы персонажей, к которым отправляются команды
+    :param clients: количество одновременных клиентов
+    :param commands_per_client: количество команд от одного клиента
+    :param in_flight: максимальное количество неотвеченных команд одного клиента
+    :param seed: начальное значение генератора случайных чисел
+
+    :return: словарь с количеством команд, командами в секунду и перцентилями задержки p50 и p99 в миллисекундах
+    """
+    latencies = []
+    rng = random.Random(seed)
+
+    async def run_client() -> None:
+        client = await GameClient.connect(port=port)
+        semaphore = asyncio.Semaphore(in_flight)
+
+        async def one_command() -> None:
+            # место освобождается и при ошибке отправки, иначе цикл ниже ждал бы его вечно
+            try:
+                command, arg = rng.choice((('heal', 5), ('xp', 10), ('damage', 1)))
+                start = time.perf_counter()
+                await client.send(command, rng.choice(characters), arg)
+                latencies.append(time.perf_counter() - start)
+            finally:
+                semaphore.release()
+
+        tasks = []
+        for _ in range(commands_per_client):
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(one_command()))
+        await asyncio.gather(*tasks)
+        await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'commands': len(latencies),
+        'commands_per_second': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+async def main() -> None:
+    """ Демонстрация: сервер, несколько команд от клиента и замер нагрузки """
+    server = GameServer()
+    await server.start()
+    client = await GameClient.connect(port=server.port)
+    print(await client.send('spawn', 53642, 'Magician', 'MasterMerlin'))
+    print(await client.send('cast_spell', 53642, 'Attack Spell'))
+    print(await client.send('cast_spell', 53642, 'Unknown Spell'))
+    await client.close()
+
+    for id_ in range(1, 1001):
+        server.spawn(Warrior(id_=id_, name=f"Player{id_}"))
+    report = await run_load(server.port, characters=list(range(1, 1001)))
+    print(f"Команд: {report['commands']}, команд в секунду: {report['commands_per_second']:.0f}, "
+          f"p50: {report['p50_ms']:.2f} мс, p99: {report['p99_ms']:.2f} мс")
+    await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
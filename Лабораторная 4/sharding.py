@@ -0,0 +1,414 @@
+"""
+Мир персонажей из Lab4.py, разделённый между несколькими процессами (шардами) по идентификатору персонажа.
+
+Персонаж с идентификатором id_ принадлежит шарду id_ % shards_count и живёт в памяти процесса этого шарда,
+поэтому такты разных шардов выполняются параллельно на разных ядрах, без GIL одного интерпретатора.
+
+Характеристики персонажей хранятся в общей памяти (multiprocessing.shared_memory): таблица из capacity строк,
+в строке - id_ персонажа и значения его SYNC_FIELDS. Строку выделяет координатор при создании персонажа, а в конце
+такта шард переписывает строки только изменившихся персонажей. Поэтому координатор читает характеристики
+(state, request_state) без обращения к шардам, а шарды по той же таблице выбирают цели атак на других шардах.
+
+Координатор раз в такт отправляет каждому шарду одну пачку команд. Атака выполняется в две фазы: на шарде
+атакующего тратится мана или выносливость, а получившийся урон шард пачкой пересылает напрямую шарду цели (через
+его очередь входящих сообщений), без участия координатора. Ошибки второй фазы (например, цели нет) шард цели
+возвращает координатору. Команда skirmish задаёт нагрузку такта целиком: её генерирует каждый шард для своих
+персонажей, поэтому работа координатора за такт не зависит от количества персонажей.
+Методы постановки команд возвращают номер команды, под которым её результат будет в списке, возвращаемом tick().
+"""
+import multiprocessing
+import random
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection
+
+from Lab4 import Character, Magician, Warrior
+from persistence import LOGGED_METHODS
+
+""" Классы персонажей, которых можно создать на шарде, по имени класса """
+CHARACTER_CLASSES = {cls.__name__: cls for cls in (Character, Magician, Warrior)}
+
+""" Методы персонажа, которые можно вызвать командой call (изменяющие состояние методы и регенерация) """
+CALLABLE_METHODS = LOGGED_METHODS + ('regenerate',)
+
+""" Количество столбцов таблицы характеристик: id_ и значения SYNC_FIELDS (у ролей их не больше шести) """
+TABLE_COLUMNS = 1 + max(len(cls.SYNC_FIELDS) for cls in CHARACTER_CLASSES.values())
+
+""" Столбцы характеристик в строке таблицы для каждого класса персонажа (столбец 0 - id_) """
+FIELD_COLUMNS = {cls: {field: column for column, field in enumerate(cls.SYNC_FIELDS, 1)}
+                 for cls in CHARACTER_CLASSES.values()}
+
+""" Значение столбца id_ в свободной строке таблицы """
+FREE_ROW = -1
+
+
+def _attack(character: Character, ability: str) -> int:
+    """
+    Использует атакующую способность персонажа
+
+    :param character: атакующий персонаж (Magician или Warrior)
+    :param ability: заклинание из Magician.SPELLS или удар из Warrior.HITS
+
+    :raise ValueError: если персонаж не может атаковать, способности не существует или не хватает ресурса
+
+    :return: урон, который нужно нанести цели
+    """
+    if isinstance(character, Magician):
+        character.cast_the_spell(ability)
+        return character.SPELL_DAMAGE[ability]
+    if isinstance(character, Warrior):
+        character.hit_the_enemy(ability)
+        return character.HIT_DAMAGE[ability]
+    raise ValueError("Персонаж без роли не может атаковать")
+
+
+def _run_shard(index: int, shards_count: int, connection: Connection, inboxes: list,
+               table_memory: shared_memory.SharedMemory) -> None:
+    """
+    Цикл процесса шарда: получает от координатора пачку команд такта, выполняет их, обменивается уроном с другими
+    шардами, записывает изменившихся персонажей в таблицу характеристик и отправляет координатору результаты.
+    Ошибка команды возвращается её результатом и не останавливает процесс шарда
+
+    Сообщение координатора: (команды, параметры skirmish или None, количество занятых строк таблицы).
+    Команды (первые два элемента - название и номер команды):
+        ('spawn', number, class_name, id_, name, row) - создать персонажа в строке row таблицы
+        ('call', number, id_, method, args) - вызвать метод персонажа из CALLABLE_METHODS
+        ('attack', number, id_, ability, target_id) - атака; урон уходит шарду цели сообщением
+                                                      (номер команды, target_id, урон)
+    Ответ: (результаты команд по порядку, [(номер атаки, ошибка второй фазы)], статистика skirmish или None)
+    """
+    table = table_memory.buf.cast('q')
+    characters = {}
+    rows = {}
+    changed = []
+    inbox = inboxes[index]
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        commands, skirmish, rows_used = message
+        results = []
+        outgoing = [[] for _ in range(shards_count)]
+        for command in commands:
+            try:
+                if command[0] == 'spawn':
+                    _, number, class_name, id_, name, row = command
+                    if id_ in characters:
+                        raise ValueError("Персонаж с таким идентификатором уже существует")
+                    character = CHARACTER_CLASSES[class_name](id_=id_, name=name)
+                    characters[id_] = character
+                    rows[id_] = row * TABLE_COLUMNS
+                    table[row * TABLE_COLUMNS] = id_
+                    character.attach_sync_queue(changed)
+                    results.append(None)
+                elif command[0] == 'call':
+                    _, number, id_, method, args = command
+                    if method not in CALLABLE_METHODS:
+                        raise AttributeError(f"Метод {method} нельзя вызвать на шарде")
+                    getattr(characters[id_], method)(*args)
+                    results.append(None)
+                elif command[0] == 'attack':
+                    _, number, id_, ability, target_id = command
+                    damage = _attack(characters[id_], ability)
+                    if damage:
+                        outgoing[target_id % shards_count].append((number, target_id, damage))
+                    results.append(damage)
+                else:
+                    raise ValueError(f"Неизвестная команда {command[0]!r}")
+            except (AttributeError, KeyError, TypeError, ValueError) as error:
+                # AttributeError - метод, которого нет у роли персонажа (например, cast_the_spell у Warrior)
+                results.append(error)
+
+        skirmish_stats = None
+        if skirmish is not None:
+            ability, heal_hp, seed = skirmish
+            rng = random.Random(seed * shards_count + index)
+            attacks = failed = 0
+            for character in characters.values():
+                try:
+                    damage = _attack(character, ability)
+                except ValueError:
+                    failed += 1
+                else:
+                    attacks += 1
+                    target_id = table[rng.randrange(rows_used) * TABLE_COLUMNS]
+                    if damage and target_id != FREE_ROW:
+                        outgoing[target_id % shards_count].append((None, target_id, damage))
+                character.heal(heal_hp)
+                character.regenerate()
+            skirmish_stats = {'attacks': attacks, 'failed': failed}
+
+        # вторая фаза: урон другим шардам уходит напрямую, каждый шард получает ровно shards_count - 1 пачек
+        for shard, messages in enumerate(outgoing):
+            if shard != index:
+                inboxes[shard].put(messages)
+        failures = []
+        incoming = [outgoing[index]] + [inbox.get() for _ in range(shards_count - 1)]
+        for messages in incoming:
+            for number, target_id, damage in messages:
+                try:
+                    characters[target_id].get_damage(damage)
+                except (KeyError, TypeError, ValueError) as error:
+                    if number is not None:
+                        failures.append((number, error))
+
+        # в таблицу переписываются только изменённые характеристики изменённых персонажей
+        for character in changed:
+            row = rows[character.id_]
+            columns = FIELD_COLUMNS[type(character)]
+            for field in character.pop_dirty_fields():
+                table[row + columns[field]] = getattr(character, field)
+        changed.clear()
+        connection.send((results, failures, skirmish_stats))
+    table.release()
+    table_memory.close()
+
+
+class ShardedWorld:
+    """ Координатор мира, разделённого на процессы-шарды по id_ персонажа """
+
+    def __init__(self, shards_count: int = multiprocessing.cpu_count(), capacity: int = 100_000):
+        """
+        Создаёт таблицу характеристик в общей памяти и запускает процессы шардов
+
+        :param shards_count: количество шардов (процессов)
+        :param capacity: максимальное количество персонажей (строк таблицы характеристик)
+
+        :raise ValueError: если количество шардов или capacity меньше 1, вызываем ошибку
+        """
+        if shards_count < 1:
+            raise ValueError("Количество шардов должно быть положительным")
+        if capacity < 1:
+            raise ValueError("Вместимость мира должна быть положительной")
+        self.shards_count = shards_count
+        self.capacity = capacity
+        self._table_memory = shared_memory.SharedMemory(create=True, size=capacity * TABLE_COLUMNS * 8)
+        table = self._table_memory.buf.cast('q')
+        for row in range(capacity):
+            table[row * TABLE_COLUMNS] = FREE_ROW
+        # представление таблицы у координатора создаётся после запуска шардов: иначе его копия в дочернем процессе
+        # не даст шарду закрыть общую память
+        table.release()
+        inboxes = [multiprocessing.Queue() for _ in range(shards_count)]
+        self._connections = []
+        self._processes = []
+        for index in range(shards_count):
+            parent_connection, child_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_run_shard, args=(index, shards_count, child_connection, inboxes, self._table_memory),
+                daemon=True,
+            )
+            process.start()
+            self._connections.append(parent_connection)
+            self._processes.append(process)
+        self._table = self._table_memory.buf.cast('q')
+        # id_ -> (строка таблицы, класс персонажа); строка выделяется при постановке spawn в очередь
+        self._rows = {}
+        self._rows_used = 0
+        # пачки команд по шардам, запросы характеристик и созданные за такт персонажи: (номер команды, id_)
+        self._batches = [[] for _ in range(shards_count)]
+        self._state_requests = []
+        self._spawns = []
+        self._skirmish = None
+        self._submitted = 0
+
+    def shard_of(self, id_: int) -> int:
+        """ Возвращает номер шарда, которому принадлежит персонаж с идентификатором id_ """
+        return id_ % self.shards_count
+
+    def _next_number(self) -> int:
+        """ Возвращает номер следующей команды такта """
+        number = self._submitted
+        self._submitted += 1
+        return number
+
+    def spawn(self, character_class: type, id_: int, name: str) -> int:
+        """
+        Ставит в очередь создание персонажа на его шарде (выполнится на ближайшем такте)
+
+        :raise ValueError: если персонаж с таким id_ уже есть (или создаётся) или таблица заполнена, вызываем ошибку
+
+        :return: номер команды
+        """
+        if id_ in self._rows:
+            raise ValueError("Персонаж с таким идентификатором уже существует")
+        if self._rows_used == self.capacity:
+            raise ValueError("В мире нет места для нового персонажа")
+        number = self._next_number()
+        self._rows[id_] = (self._rows_used, character_class)
+        self._batches[self.shard_of(id_)].append(
+            ('spawn', number, character_class.__name__, id_, name, self._rows_used))
+        self._rows_used += 1
+        self._spawns.append((number, id_))
+        return number
+
+    def call(self, id_: int, method: str, *args) -> int:
+        """
+        Ставит в очередь вызов метода персонажа из CALLABLE_METHODS на его шарде (выполнится на ближайшем такте)
+
+        :return: номер команды
+        """
+        number = self._next_number()
+        self._batches[self.shard_of(id_)].append(('call', number, id_, method, args))
+        return number
+
+    def attack(self, attacker_id: int, ability: str, target_id: int) -> int:
+        """
+        Ставит в очередь атаку: способность attacker_id, урон от которой получит target_id на своём шарде
+
+        :return: номер команды
+        """
+        number = self._next_number()
+        self._batches[self.shard_of(attacker_id)].append(('attack', number, attacker_id, ability, target_id))
+        return number
+
+    def skirmish(self, ability: str, heal_hp: int, seed: int = 0) -> int:
+        """
+        Ставит в очередь нагрузку такта для всего мира: каждый персонаж атакует способностью ability случайного
+        персонажа мира, затем лечится на heal_hp и выполняет такт регенерации. Нагрузку генерирует каждый шард
+        для своих персонажей, урон пересылается между шардами пачками
+
+        :param ability: атакующая способность (персонажи, которые не могут её использовать, пропускают атаку)
+        :param heal_hp: количество восстанавливаемого здоровья
+        :param seed: зерно генератора случайных целей
+
+        :raise ValueError: если skirmish уже поставлен на этот такт, вызываем ошибку
+
+        :return: номер команды; результат - {'attacks': атак, 'failed': пропущенных атак} по всем шардам
+        """
+        if self._skirmish is not None:
+            raise ValueError("Нагрузка на этот такт уже поставлена")
+        number = self._next_number()
+        self._skirmish = (number, (ability, heal_hp, seed))
+        return number
+
+    def request_state(self, id_: int) -> int:
+        """
+        Ставит в очередь запрос характеристик персонажа; результатом будут характеристики после такта
+
+        :return: номер команды
+        """
+        number = self._next_number()
+        self._state_requests.append((number, id_))
+        return number
+
+    def state(self, id_: int) -> dict[str, int]:
+        """
+        Возвращает характеристики персонажа (SYNC_FIELDS) на конец последнего такта из общей памяти
+
+        :raise KeyError: если персонажа с таким id_ нет, вызываем ошибку
+        """
+        row, character_class = self._rows[id_]
+        row *= TABLE_COLUMNS
+        if self._table[row] != id_:
+            # персонаж поставлен в очередь, но ещё не создан
+            raise KeyError(id_)
+        return {field: self._table[row + column] for field, column in FIELD_COLUMNS[character_class].items()}
+
+    def tick(self) -> list:
+        """
+        Выполняет игровой такт: все накопленные команды, затем пересланный между шардами урон от атак
+
+        :return: результаты команд в порядке постановки (индекс - номер, возвращённый при постановке команды):
+                 None, урон атаки, словарь характеристик, статистика skirmish или объект ошибки. Если урон атаки не
+                 удалось нанести цели (например, цели нет), результатом атаки будет ошибка второй фазы
+        """
+        batches, self._batches = self._batches, [[] for _ in range(self.shards_count)]
+        skirmish, self._skirmish = self._skirmish, None
+        results = [None] * self._submitted
+        self._submitted = 0
+        for connection, batch in zip(self._connections, batches):
+            connection.send((batch, None if skirmish is None else skirmish[1], self._rows_used))
+        all_failures = []
+        skirmish_total = {'attacks': 0, 'failed': 0}
+        for connection, batch in zip(self._connections, batches):
+            shard_results, failures, skirmish_stats = connection.recv()
+            for command, result in zip(batch, shard_results):
+                results[command[1]] = result
+            all_failures.extend(failures)
+            if skirmish_stats is not None:
+                for key, value in skirmish_stats.items():
+                    skirmish_total[key] += value
+        for number, error in all_failures:
+            results[number] = error
+        if skirmish is not None:
+            results[skirmish[0]] = skirmish_total
+        for number, id_ in self._spawns:
+            if isinstance(results[number], Exception):
+                del self._rows[id_]
+        self._spawns = []
+        for number, id_ in self._state_requests:
+            try:
+                results[number] = self.state(id_)
+            except KeyError as error:
+                results[number] = error
+        self._state_requests = []
+        return results
+
+    def close(self) -> None:
+        """ Останавливает процессы шардов и освобождает общую память """
+        for connection in self._connections:
+            connection.send(None)
+        for process in self._processes:
+            process.join()
+        self._table.release()
+        self._table_memory.close()
+        self._table_memory.unlink()
+
+
+def benchmark(shards_count: int, population: int = 20_000, ticks: int = 20, seed: int = 0) -> float:
+    """
+    Замер пропускной способности: на каждом такте каждый персонаж атакует случайного противника, лечится и
+    восстанавливает выносливость (команда skirmish)
+
+    :return: количество тактов в секунду
+    """
+    world = ShardedWorld(shards_count, capacity=population)
+    for id_ in range(population):
+        world.spawn(Warrior, id_=id_, name=f"Player{id_}")
+    world.tick()
+    start = time.perf_counter()
+    for tick in range(ticks):
+        world.skirmish('Light Hit', 20, seed=seed + tick)
+        world.tick()
+    elapsed = time.perf_counter() - start
+    world.close()
+    return ticks / elapsed
+
+
+def single_process_benchmark(population: int = 20_000, ticks: int = 20, seed: int = 0) -> float:
+    """ Та же нагрузка, что и в benchmark(), в одном процессе без шардов; возвращает количество тактов в секунду """
+    rng = random.Random(seed)
+    characters = [Warrior(id_=id_, name=f"Player{id_}") for id_ in range(population)]
+    start = time.perf_counter()
+    for _ in range(ticks):
+        damages = []
+        for character in characters:
+            try:
+                damages.append((rng.randrange(population), _attack(character, 'Light Hit')))
+            except ValueError:
+                pass
+            character.heal(20)
+            character.regenerate()
+        for target_id, damage in damages:
+            characters[target_id].get_damage(damage)
+    return ticks / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    world = ShardedWorld(shards_count=2, capacity=100)
+    world.spawn(Magician, id_=53642, name="MasterMerlin")
+    world.spawn(Warrior, id_=53643, name="TrollSlayer")
+    world.tick()
+    world.attack(53642, 'Attack Spell', 53643)
+    world.attack(53643, 'Heavy Hit', 53642)
+    world.attack(53642, 'Attack Spell', 99)
+    world.call(53643, 'cast_the_spell', 'Attack Spell')
+    world.request_state(53642)
+    world.request_state(53643)
+    print(world.tick())
+    world.close()
+
+    print(f"Один процесс без шардов, тактов в секунду: {single_process_benchmark():.2f}")
+    for shards_count in sorted({1, 2, 4, multiprocessing.cpu_count()}):
+        print(f"Шардов: {shards_count}, тактов в секунду: {benchmark(shards_count):.2f}")
@@ -0,0 +1,172 @@
+"""
+Синхронизация состояния персонажей из Lab4.py с клиентами через компактные бинарные дельты.
+
+Персонажи сами отмечают изменённые характеристики (Character.SYNC_FIELDS) и при первом изменении встают в очередь
+синхронизатора, поэтому стоимость дельты на такте пропорциональна количеству изменений, а не числу персонажей.
+Для новых клиентов и восстановления после рассинхронизации есть полный снимок.
+
+Формат пакета (little-endian):
+    заголовок: тип пакета (B: 0 - дельта, 1 - полный снимок), номер такта (I), количество персонажей (I)
+    для каждого персонажа: id_ (q), количество полей (B), затем для каждого поля: код поля (B), значение (q)
+"""
+import struct
+import time
+from typing import Iterable
+
+from Lab4 import Character, Magician, Warrior
+
+""" Коды синхронизируемых полей: код поля - это его индекс в кортеже """
+FIELDS = ('xp', 'current_hp', 'max_hp', 'lvl', 'current_mana', 'max_mana', 'current_stamina', 'max_stamina')
+FIELD_CODES = {field: code for code, field in enumerate(FIELDS)}
+
+DELTA_PACKET = 0
+FULL_SNAPSHOT_PACKET = 1
+
+_HEADER = struct.Struct('<BII')
+_CHARACTER = struct.Struct('<qB')
+_FIELD = struct.Struct('<Bq')
+
+
+def _encode(packet_type: int, tick: int, entries: list[tuple[int, Iterable[tuple[str, int]]]]) -> bytes:
+    """
+    Собирает бинарный пакет из списка пар (id_ персонажа, пары (поле, значение))
+
+    :return: пакет в виде bytes
+    """
+    parts = [_HEADER.pack(packet_type, tick, len(entries))]
+    for id_, fields in entries:
+        fields = list(fields)
+        parts.append(_CHARACTER.pack(id_, len(fields)))
+        parts.extend(_FIELD.pack(FIELD_CODES[field], value) for field, value in fields)
+    return b''.join(parts)
+
+
+def decode_packet(data: bytes) -> tuple[int, int, dict[int, dict[str, int]]]:
+    """
+    Разбирает пакет, собранный синхронизатором (используется клиентом)
+
+    :param data: бинарный пакет
+
+    :raise ValueError: если пакет повреждён или имеет неизвестный тип, вызываем ошибку
+
+    :return: тип пакета, номер такта и словарь {id_ персонажа: {поле: значение}}
+    """
+    try:
+        packet_type, tick, count = _HEADER.unpack_from(data, 0)
+        offset = _HEADER.size
+        characters = {}
+        for _ in range(count):
+            id_, fields_count = _CHARACTER.unpack_from(data, offset)
+            offset += _CHARACTER.size
+            fields = {}
+            for _ in range(fields_count):
+                code, value = _FIELD.unpack_from(data, offset)
+                offset += _FIELD.size
+                fields[FIELDS[code]] = value
+            characters[id_] = fields
+    except (struct.error, IndexError) as error:
+        raise ValueError("Повреждённый пакет синхронизации") from error
+    if packet_type not in (DELTA_PACKET, FULL_SNAPSHOT_PACKET) or offset != len(data):
+        raise ValueError("Повреждённый пакет синхронизации")
+    return packet_type, tick, characters
+
+
+class WorldSync:
+    """ Синхронизатор: отслеживает набор персонажей и собирает для них дельты и полные снимки """
+
+    def __init__(self):
+        """ Инициализация синхронизатора без отслеживаемых персонажей """
+        self._characters = {}
+        self._changed = []
+
+    def __len__(self) -> int:
+        """ Количество отслеживаемых персонажей """
+        return len(self._characters)
+
+    def track(self, character: Character) -> None:
+        """
+        Начинает отслеживать персонажа. Ранее накопленные изменения попадут в ближайшую дельту
+
+        :param character: персонаж (Character, Magician или Warrior)
+
+        :raise ValueError: если персонаж с таким id_ уже отслеживается, вызываем ошибку
+        """
+        if character.id_ in self._characters:
+            raise ValueError("Персонаж с таким идентификатором уже отслеживается")
+        self._characters[character.id_] = character
+        character.attach_sync_queue(self._changed)
+
+    def untrack(self, character: Character) -> None:
+        """
+        Прекращает отслеживать персонажа
+
+        :param character: отслеживаемый персонаж
+        """
+        if self._characters.pop(character.id_, None) is not None:
+            character.attach_sync_queue(None)
+
+    def encode_delta(self, tick: int) -> bytes:
+        """
+        Собирает дельту: только персонажи, изменившиеся с прошлой синхронизации, и только изменённые поля.
+        После вызова изменения считаются отправленными
+
+        :param tick: номер такта
+
+        :return: бинарный пакет-дельта
+        """
+        changed = self._changed.copy()
+        self._changed.clear()
+        entries = []
+        for character in changed:
+            if self._characters.get(character.id_) is not character:
+                continue
+            dirty_fields = character.pop_dirty_fields()
+            if dirty_fields:
+                entries.append((character.id_, [(field, getattr(character, field)) for field in dirty_fields]))
+        return _encode(DELTA_PACKET, tick, entries)
+
+    def encode_full_snapshot(self, tick: int) -> bytes:
+        """
+        Собирает полный снимок всех отслеживаемых персонажей со всеми полями SYNC_FIELDS.
+        Накопленные изменения при этом считаются отправленными
+
+        :param tick: номер такта
+
+        :return: бинарный пакет с полным снимком
+        """
+        for character in self._changed:
+            character.pop_dirty_fields()
+        self._changed.clear()
+        entries = [
+            (id_, [(field, getattr(character, field)) for field in character.SYNC_FIELDS])
+            for id_, character in self._characters.items()
+        ]
+        return _encode(FULL_SNAPSHOT_PACKET, tick, entries)
+
+
+if __name__ == "__main__":
+    world_sync = WorldSync()
+    magician = Magician(id_=53642, name="MasterMerlin")
+    warrior = Warrior(id_=53643, name="TrollSlayer")
+    world_sync.track(magician)
+    world_sync.track(warrior)
+
+    print(decode_packet(world_sync.encode_full_snapshot(tick=1)))
+    magician.cast_the_spell('Attack Spell')
+    print(decode_packet(world_sync.encode_delta(tick=2)))
+    print(decode_packet(world_sync.encode_delta(tick=3)))
+
+    # бенчмарк: на такте меняется 1% из 100 000 персонажей
+    population = 100_000
+    world_sync = WorldSync()
+    characters = [Warrior(id_=id_, name=f"Player{id_}") for id_ in range(population)]
+    for character in characters:
+        world_sync.track(character)
+    full_snapshot = world_sync.encode_full_snapshot(tick=1)
+    start = time.perf_counter()
+    for character in characters[::100]:
+        character.hit_the_enemy('Light Hit')
+    delta = world_sync.encode_delta(tick=2)
+    finished = time.perf_counter()
+    print(f"Полный снимок: {len(full_snapshot)} байт, дельта: {len(delta)} байт, "
+          f"сборка дельты: {(finished - start) * 1000:.1f} мс")